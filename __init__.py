@@ -1,15 +1,24 @@
 """The Tech Verano integration."""
 from __future__ import annotations
 
+import asyncio
+from datetime import timedelta
 import logging
 
+import aiohttp
+from homeassistant.components.diagnostics import async_redact_data
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import aiohttp_client
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE, Platform
+from homeassistant.core import Event, HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util.ssl import get_default_context
 
-from .const import DOMAIN
-from .verano import TECH_VERANO
+from .const import DATA_I18N, DOMAIN, MODULES_REFRESH_INTERVAL, TO_REDACT
+from .coordinator import TechVeranoCoordinator
+from .i18n import TechLanguageCache
+from .inventory import TechModuleInventory
+from .verano import TECH_VERANO, TechError, create_session
 
 # ----------- GLOBAL ----------- #
 _LOGGER = logging.getLogger(__name__)
@@ -24,7 +33,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Tech Verano from a config entry."""
 
     _LOGGER.debug("Setting up component's entry.")
-    _LOGGER.debug("Entry -> title: " + entry.title + ", data: " + str(entry.data) + ", id: " + entry.entry_id + ", domain: " + entry.domain)
+    _LOGGER.debug(
+        "Entry -> title: %s, data: %s, id: %s, domain: %s",
+        entry.title, async_redact_data(entry.data, TO_REDACT), entry.entry_id, entry.domain
+    )
     
 
     hass.data.setdefault(DOMAIN, {})
@@ -33,9 +45,60 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # TODO 3. Store an API object for your platforms to access
     # hass.data[DOMAIN][entry.entry_id] = MyApi(...)
 
-    http_session = aiohttp_client.async_get_clientsession(hass)
-    hass.data[DOMAIN][entry.entry_id] = TECH_VERANO(http_session, entry.data["user_id"], entry.data["token"])
-    await hass.config_entries.async_forward_entry_setups(entry,PLATFORMS)
+    # Own session: tuned pool and deadlines, and a cookie jar per account.
+    http_session = create_session(get_default_context())
+    api = TECH_VERANO(
+        http_session, entry.data["user_id"], entry.data["token"],
+        username=entry.data["user"], password=entry.data["pass"],
+        on_token_refresh=lambda user_id, token: hass.config_entries.async_update_entry(
+            entry, data={**entry.data, "user_id": user_id, "token": token}
+        )
+    )
+
+    async def async_close_session(event: Event | None = None) -> None:
+        """Close the session of the entry, on unload or when HA closes."""
+        await http_session.close()
+
+    # HA does not unload entries when it closes.
+    entry.async_on_unload(async_close_session)
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, async_close_session))
+
+    try:
+        # Stored modules, eMODUL is only asked on the first setup.
+        inventory = TechModuleInventory(hass, entry)
+        try:
+            await inventory.async_load(api)
+        except (TechError, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            # Nothing stored yet and eMODUL unreachable, HA retries the setup.
+            raise ConfigEntryNotReady(f"Listing modules failed: {e}") from e
+
+        if DATA_I18N not in hass.data:
+            hass.data[DATA_I18N] = TechLanguageCache(hass)
+
+        coordinator = TechVeranoCoordinator(hass, api, inventory, hass.data[DATA_I18N])
+
+        hass.data[DOMAIN][entry.entry_id] = coordinator
+        entry.async_on_unload(coordinator.async_shutdown)
+        await hass.config_entries.async_forward_entry_setups(entry,PLATFORMS)
+    except Exception:
+        hass.data[DOMAIN].pop(entry.entry_id, None)
+        await http_session.close()
+        raise
+
+    # Entities start from their restored state, the first fetch (language
+    # dictionary and module tiles) does not delay startup.
+    entry.async_create_background_task(
+        hass, coordinator.async_refresh(), f"{DOMAIN} first refresh {entry.entry_id}"
+    )
+
+    # New and removed controllers are picked up in the background.
+    entry.async_on_unload(async_track_time_interval(
+        hass, coordinator.async_refresh_modules, timedelta(seconds=MODULES_REFRESH_INTERVAL)
+    ))
+    if inventory.outdated:
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh_modules(), f"{DOMAIN} modules refresh {entry.entry_id}"
+        )
 
     return True
 
@@ -43,7 +106,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     
+    # The session is closed by the unload callback registered at setup.
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored data of a deleted config entry."""
+
+    await TechModuleInventory(hass, entry).async_remove()
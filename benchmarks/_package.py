@@ -0,0 +1,16 @@
+"""Import helper for the benchmarks and the tests.
+
+Registers the integration directory as the "tech_verano" package without
+running its __init__, so modules that do not depend on Home Assistant can be
+imported outside of it.
+"""
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if "tech_verano" not in sys.modules:
+    package = types.ModuleType("tech_verano")
+    package.__path__ = [ROOT]
+    sys.modules["tech_verano"] = package
@@ -0,0 +1,85 @@
+"""Event-loop blocking benchmark of the JSON codec.
+
+Usage:
+    python benchmarks/bench_codec.py [--tiles T] [--strings S] [--number N]
+
+Decodes a module payload with [tiles] tiles and a language dictionary with
+[strings] entries [number] times each, with the former inline stdlib decoding
+and with every JsonCodec configuration, while a ticker task measures how long
+the event loop is blocked. Offloaded decoding still holds the GIL, but the
+loop gets it back every switch interval (5 ms) instead of waiting for the
+whole decode.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import _package  # noqa: F401
+import payloads
+from tech_verano.codec import JsonCodec, orjson
+
+
+class InlineStdlib:
+    """Former decoding, json.loads on the event loop."""
+
+    backend = "json"
+    offload_threshold = None
+
+    async def decode(self, body):
+        return json.loads(body)
+
+
+async def measure(codec, body, number):
+    """Returns the decode time, the 95th percentile and the longest loop stall, in ms."""
+    loop = asyncio.get_running_loop()
+    stalls = []
+    running = True
+
+    async def ticker():
+        last = loop.time()
+        while running:
+            await asyncio.sleep(0)
+            now = loop.time()
+            stalls.append(now - last)
+            last = now
+
+    task = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    for _ in range(number):
+        await codec.decode(body)
+        # Let the ticker run between decodes, a stall then covers one decode.
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    running = False
+    await task
+    stalls.sort()
+    return elapsed / number * 1e3, stalls[int(len(stalls) * 0.95)] * 1e3, stalls[-1] * 1e3
+
+
+async def main(args):
+    bodies = {
+        "module payload": json.dumps(payloads.module_data(args.tiles)).encode(),
+        "language dict": json.dumps({"data": payloads.language_strings(args.strings)}).encode(),
+    }
+    codecs = [("stdlib inline (before)", InlineStdlib())]
+    codecs.append(("json, offloaded", JsonCodec(backend="json", offload_threshold=0)))
+    if orjson is not None:
+        codecs.append(("orjson inline", JsonCodec(backend="orjson", offload_threshold=None)))
+        codecs.append(("orjson, offloaded", JsonCodec(backend="orjson", offload_threshold=0)))
+    codecs.append(("default codec", JsonCodec()))
+
+    for name, body in bodies.items():
+        print(f"{name}: {len(body) / 1024:.0f} KiB")
+        for label, codec in codecs:
+            per_call, p95, stall = await measure(codec, body, args.number)
+            print(f"  {label:24} decode {per_call:6.2f} ms   loop stall p95 {p95:6.2f} / max {stall:6.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tiles", type=int, default=2000)
+    parser.add_argument("--strings", type=int, default=20000)
+    parser.add_argument("--number", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,112 @@
+"""Benchmark of TECH_VERANO.update_cookies against the former implementation.
+
+Usage:
+    python benchmarks/bench_cookies.py [--number N]
+
+Measures the cost per response of a response without Set-Cookie headers, of
+a response repeating the cookies already stored and of a response setting
+new cookies.
+"""
+import argparse
+import asyncio
+import logging
+import timeit
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+
+import _package  # noqa: F401
+from tech_verano.verano import TECH_VERANO
+
+SET_COOKIES = (
+    "session=0123456789abcdef0123456789abcdef; expires=Fri, 17 Oct 2036 10:00:00 GMT; Max-Age=31536000; path=/; secure; HttpOnly; SameSite=Lax",
+    "XSRF-TOKEN=fedcba9876543210fedcba9876543210; path=/; secure; SameSite=Lax",
+)
+HEADERS = (
+    ("Content-Type", "application/json"),
+    ("Content-Encoding", "gzip"),
+    ("Connection", "keep-alive"),
+    ("Date", "Fri, 17 Oct 2026 10:00:00 GMT"),
+    ("Server", "nginx"),
+)
+
+
+class FakeResponse:
+    """The parts of aiohttp.ClientResponse used by update_cookies."""
+
+    def __init__(self, set_cookies):
+        headers = list(HEADERS) + [("Set-Cookie", c) for c in set_cookies]
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.raw_headers = tuple((k.encode(), v.encode()) for k, v in headers)
+
+
+async def legacy_update_cookies(self, response):
+    """update_cookies before the fast path."""
+
+    from http.cookies import SimpleCookie, Morsel
+
+    cookie_set = SimpleCookie()
+
+    try:
+        for k in response.raw_headers:
+            if "Set-Cookie" in k[0].decode():
+                cookie_elements = [x.strip() for x in k[1].decode("utf-8").split(';')]
+                c_row = [x.strip() for x in cookie_elements[0].split('=')]
+                cookie_set[c_row[0]] = c_row[1]
+                for i in cookie_elements:
+                    if '=' in i:
+                        c = [x.strip() for x in i.split('=')]
+                        if len(c) == 2 and c[0] != c_row[0]:
+                            cookie_set[c_row[0]][c[0]] = c[1]
+                cookie_set[c_row[0]]['HttpOnly'] = True
+                cookie_set[c_row[0]]['secure'] = True
+                cookie_set[c_row[0]]['domain'] = 'emodul.eu'
+                if len(cookie_set) > 0:
+                    self.session.cookie_jar.update_cookies(cookie_set)
+    except Exception:
+        pass
+
+
+def _run_legacy(api, responses):
+    for response in responses:
+        # The former implementation is a coroutine that never awaits.
+        coro = legacy_update_cookies(api, response)
+        try:
+            coro.send(None)
+        except StopIteration:
+            pass
+
+
+def _run_current(api, responses):
+    for response in responses:
+        api.update_cookies(response)
+
+
+async def main(number):
+    # Measure the parsing, not the log handlers.
+    logging.getLogger().setLevel(logging.WARNING)
+
+    cases = (
+        ("no Set-Cookie", lambda n: FakeResponse(())),
+        ("same cookies", lambda n: FakeResponse(SET_COOKIES)),
+        ("new cookies", lambda n: FakeResponse((f"session={n:032x}; path=/; secure; HttpOnly",))),
+    )
+
+    print(f"{number} responses per run, best of 5")
+    for name, make in cases:
+        results = []
+        for run in (_run_legacy, _run_current):
+            # Fresh session per implementation, so both start with the same jar.
+            async with aiohttp.ClientSession() as session:
+                api = TECH_VERANO(session, "1", "token")
+                api.update_cookies(make(-1))
+                runs = [[make(i * number + n) for n in range(number)] for i in range(5)]
+                best = min(timeit.timeit(lambda: run(api, responses), number=1) for responses in runs)
+                results.append(best / number)
+        print(f"{name:>14}: before {results[0] * 1e6:7.2f} us, after {results[1] * 1e6:7.2f} us per response")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000)
+    asyncio.run(main(parser.parse_args().number))
@@ -0,0 +1,135 @@
+"""Polling benchmark of TECH_VERANO against the local mock eMODUL server.
+
+Usage:
+    python benchmarks/bench_polling.py [--modules N] [--entities M] [--tiles T]
+        [--latency S] [--error-rate R] [--duration S] [--concurrency C]
+
+Polls N modules with M simulated thermostat entities each for [duration]
+seconds and reports polls per second, requests per poll, event-loop lag and
+memory. With --concurrency 1 modules are fetched one after another.
+
+Each poll diffs the snapshots like the coordinator, and only entities whose
+tiles changed look up their values. climate.py itself is not measured, it
+needs Home Assistant: the entities are simulated with the index lookups of
+update_properties, keyed by the txtIds of the thermostat labels.
+"""
+import argparse
+import asyncio
+import logging
+import time
+import tracemalloc
+
+import _package  # noqa: F401
+from mock_server import TOKEN, USER_ID, MockEmodul
+from tech_verano.resilience import RetryPolicy
+from tech_verano.verano import MAX_CONCURRENT_FETCHES, TECH_VERANO, create_session
+
+# Tiles and labels read by a thermostat, see climate.update_properties.
+ENTITY_LABELS = (
+    (53, "Heating"), (53, "Cooling"), (58, "Current temperature"), (58, "Set temp."),
+    (63, "Mode"), (62, "Fan 0-10 V (F)"), (54, "Profile"),
+)
+ENTITY_TILES = frozenset(tile_id for tile_id, _ in ENTITY_LABELS)
+
+
+def entity_keys(api):
+    """Returns the (tile ID, txtId) keys read by a thermostat."""
+    txt_ids = api.language_txt_ids(label for _, label in ENTITY_LABELS)
+    keys = [(53, 0)]
+    for tile_id, label in ENTITY_LABELS:
+        keys.extend((tile_id, txt_id) for txt_id in txt_ids.get(label, ()))
+    return tuple(keys)
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a periodic task."""
+
+    def __init__(self, interval = 0.01):
+        self.interval = interval
+        self.lags = []
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(loop.time() - start - self.interval)
+
+
+async def poll(api, modules, entities, keys, previous):
+    """Fetch every module like the coordinator and update the simulated entities
+    of the modules whose thermostat tiles changed."""
+    snapshots, errors = await api.get_module_tile_snapshots(
+        (module["udid"] for module in modules), max_age=0, max_staleness=0
+    )
+    updates = 0
+    for udid, snapshot in snapshots.items():
+        if snapshot.diff(previous.get(udid)).isdisjoint(ENTITY_TILES):
+            continue
+        index = snapshot.index
+        for _ in range(entities):
+            updates += 1
+            for key in keys:
+                index.get(key)
+    previous.update(snapshots)
+    return updates, len(errors)
+
+
+async def main(args):
+    # Injected errors would flood the output with retry warnings.
+    logging.disable(logging.WARNING)
+    server = MockEmodul(args.modules, args.tiles, args.latency, args.error_rate, change_rate=0.01)
+    url = await server.start()
+
+    session = create_session()
+    api = TECH_VERANO(
+        session, str(USER_ID), TOKEN, base_url=url,
+        retry_policy=RetryPolicy(attempts=3, base_delay=0.01, max_delay=0.05),
+        max_concurrent_fetches=args.concurrency
+    )
+    api.language_strings_dict = (await api.language_strings())["data"]
+    modules = await api.list_modules()
+    server.requests.clear()
+
+    monitor = LoopLagMonitor()
+    monitor_task = asyncio.ensure_future(monitor.run())
+    tracemalloc.start()
+
+    keys = entity_keys(api)
+    previous = {}
+    polls = failures = updates = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.duration:
+        polled, failed = await poll(api, modules, args.entities, keys, previous)
+        updates += polled
+        failures += failed
+        polls += 1
+    elapsed = time.perf_counter() - start
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    monitor_task.cancel()
+    await session.close()
+    await server.stop()
+
+    lags = sorted(monitor.lags) or [0.0]
+    requests = sum(server.requests.values())
+    print(f"{args.modules} modules x {args.entities} entities, {args.tiles} tiles, "
+          f"latency {args.latency} s, concurrency {args.concurrency}")
+    print(f"  polls/s:          {polls / elapsed:8.1f} ({failures} module fetches failed)")
+    print(f"  requests/poll:    {requests / max(polls, 1):8.2f}")
+    print(f"  updates/poll:     {updates / max(polls, 1):8.1f} of {args.modules * args.entities} entities")
+    print(f"  loop lag p50/max: {lags[len(lags) // 2] * 1e3:8.2f} / {lags[-1] * 1e3:.2f} ms")
+    print(f"  memory peak:      {peak / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=4)
+    parser.add_argument("--entities", type=int, default=10)
+    parser.add_argument("--tiles", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_FETCHES)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,74 @@
+"""Benchmark of the selective decoding of module payloads.
+
+Usage:
+    python benchmarks/bench_selective.py [--tiles T] [--menu M] [--number N]
+
+Decodes a module payload with [tiles] tiles and [menu] menu items, like
+refresh_module does, with a full decode and with the selective decode (a full
+decode with pruning, and streaming with ijson when installed), and reports the
+time and the peak memory of each. The resulting tile snapshots are checked to
+be equal.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import _package  # noqa: F401
+import payloads
+from tech_verano import codec as codec_module
+from tech_verano.codec import JsonCodec
+from tech_verano.decoder import TILE_DECODERS, TileDecoder
+
+
+def full(codec, body):
+    result = codec.loads(body)
+    return result["tiles"], result["zones"]["elements"]
+
+
+def selective(codec, body):
+    result = codec.extract_module(body, TILE_DECODERS)
+    return result["tiles"], result["zones"]["elements"]
+
+
+def measure(extract, codec, body, number):
+    """Returns the time per decode in ms, the peak memory in KiB and the tiles."""
+    start = time.perf_counter()
+    for _ in range(number):
+        extract(codec, body)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    tiles, _ = extract(codec, body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / number * 1e3, peak / 1024, tiles
+
+
+def main(args):
+    body = json.dumps(payloads.module_data(args.tiles, n_menu=args.menu)).encode()
+    decoder = TileDecoder(payloads.language_strings(2000))
+    print(f"module payload: {len(body) / 1024:.0f} KiB, {args.tiles} tiles, {args.menu} menu items")
+
+    cases = [
+        ("full decode", full, JsonCodec()),
+        ("selective, pruned", selective, JsonCodec(stream_threshold=None)),
+    ]
+    if codec_module.ijson is not None:
+        cases.append(("selective, ijson", selective, JsonCodec(stream_threshold=0)))
+
+    reference = None
+    for label, extract, codec in cases:
+        per_call, peak, tiles = measure(extract, codec, body, args.number)
+        snapshot = decoder.decode(tiles)
+        reference = reference or snapshot
+        same = snapshot.index == reference.index and snapshot.tiles == reference.tiles
+        print(f"  {label:18} {per_call:7.2f} ms   peak {peak:8.1f} KiB   same snapshot: {same}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tiles", type=int, default=500)
+    parser.add_argument("--menu", type=int, default=2000)
+    parser.add_argument("--number", type=int, default=20)
+    main(parser.parse_args())
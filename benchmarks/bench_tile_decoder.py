@@ -0,0 +1,100 @@
+"""Micro-benchmark of the tile decoder against the former inline decoding loop.
+
+Usage:
+    python benchmarks/bench_tile_decoder.py [--tiles N] [--payload module.json --strings i18n.json]
+
+A recorded module payload (api/v1/users/{id}/modules/{udid}) and language
+dictionary (api/v1/i18n/en) can be given instead of the synthetic ones.
+"""
+import argparse
+import json
+import timeit
+import tracemalloc
+
+import _package  # noqa: F401
+import payloads
+from tech_verano.decoder import TileDecoder
+
+
+def legacy_decode(tiles, language_strings_dict):
+    """The decoding loop of get_module_tiles before the decoder registry."""
+    temp_tiles = {}
+    index = {}
+    if tiles:
+        for tile in tiles:
+            if tile["type"] == 6:
+                if (tile_params := tile["params"]) is not None:
+                    data = []
+                    for k, v in tile_params.items():
+                        if ("widget" in k) and (txt_id := v.get("txtId")) != 0:
+                            t = [language_strings_dict.get(str(txt_id))]
+                            if v.get("unit") == 7:
+                                value = v.get("value")/10
+                                t.append(value)
+                            elif v.get("unit") == 18:
+                                value = v.get("value")
+                                t.append(language_strings_dict.get(str(value)))
+                            else:
+                                value = v.get("value")
+                                t.append(value)
+                            data.append(t)
+                            index[(tile["id"], txt_id)] = value
+                    temp_tiles[tile["id"]] = data
+            elif tile["type"] == 40:
+                if (tile_params := tile["params"]) is not None:
+                    temp_tiles[tile["id"]] = [
+                        language_strings_dict.get(str(tile_params.get("headerId"))),
+                        language_strings_dict.get(str(tile_params.get("statusId")))
+                    ]
+                    index[(tile["id"], tile_params.get("headerId"))] = tile_params.get("statusId")
+                    index[(tile["id"], 0)] = tile_params.get("statusId")
+            elif tile["type"] == 50:
+                if (tile_params := tile["params"]) is not None:
+                    temp_tiles[tile["id"]] = [
+                        language_strings_dict.get(str(tile_params.get("txtId"))),
+                        tile_params.get("controllerName"),
+                        tile_params.get("version")
+                    ]
+                    index[(tile["id"], tile_params.get("txtId"))] = tile_params.get("version")
+    return temp_tiles, index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tiles", type=int, default=2000, help="number of synthetic tiles")
+    parser.add_argument("--payload", help="recorded module payload (JSON)")
+    parser.add_argument("--strings", help="recorded language dictionary (JSON)")
+    parser.add_argument("--number", type=int, default=200, help="decodes per measurement")
+    args = parser.parse_args()
+
+    if args.payload:
+        with open(args.payload, encoding="utf-8") as f:
+            tiles = json.load(f)["tiles"]
+    else:
+        tiles = payloads.module_tiles(args.tiles)
+    if args.strings:
+        with open(args.strings, encoding="utf-8") as f:
+            strings = json.load(f)["data"]
+    else:
+        strings = payloads.language_strings()
+
+    decoder = TileDecoder(strings)
+    legacy_index = legacy_decode(tiles, strings)[1]
+    assert decoder.decode(tiles).index == legacy_index, "decoders disagree"
+
+    print(f"{len(tiles)} tiles, {args.number} decodes per run, best of 5")
+    for name, stmt in (
+        ("legacy loop", lambda: legacy_decode(tiles, strings)),
+        ("TileDecoder", lambda: decoder.decode(tiles)),
+    ):
+        best = min(timeit.repeat(stmt, number=args.number, repeat=5))
+        tracemalloc.start()
+        result = stmt()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del result
+        print(f"{name:>12}: {best / args.number * 1e6:9.1f} us/decode, {size / 1024:8.1f} KiB retained")
+
+
+if __name__ == "__main__":
+    main()
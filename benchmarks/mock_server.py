@@ -0,0 +1,163 @@
+"""Local stand-in for the eMODUL endpoints used by TECH_VERANO.
+
+Serves synthetic module payloads with configurable latency and errors.
+
+Usage:
+    python benchmarks/mock_server.py [--port 8080] [--modules 2] [--tiles 200]
+        [--latency 0.05] [--error-rate 0.0]
+
+Then point TECH_VERANO at it with base_url="http://127.0.0.1:8080/".
+"""
+import argparse
+import asyncio
+import collections
+import hashlib
+import json
+import random
+
+from aiohttp import web
+
+import payloads
+
+USER_ID = 1
+TOKEN = "mock-token"
+
+
+class MockEmodul:
+    """eMODUL API stand-in.
+
+    Attributes:
+        latency - response delay in seconds, or a (min, max) range
+        error_rate - share of data requests answered with [error_status]
+        change_rate - share of tile widgets changing value between requests
+        requests - number of requests per route
+    """
+
+    def __init__(self, modules = 2, tiles = 200, latency = 0.0, error_rate = 0.0,
+                 error_status = 503, change_rate = 0.0, strings = 20000, seed = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.change_rate = change_rate
+        self.token = TOKEN
+        self.requests = collections.Counter()
+        self.control_data = []
+        self._random = random.Random(seed)
+
+        self.modules = [
+            {"id": index, "udid": f"mock{index:04d}", "version": "1.0.12", "name": f"Mock Verano {index}"}
+            for index in range(modules)
+        ]
+        self.module_data = {
+            module["udid"]: payloads.module_data(tiles, seed=seed + module["id"])
+            for module in self.modules
+        }
+        self.strings_body = json.dumps({"data": payloads.language_strings(strings)}).encode()
+        self.strings_etag = '"' + hashlib.md5(self.strings_body).hexdigest() + '"'
+
+    def application(self):
+        """Returns the aiohttp application serving the API."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post("/frontend/login", self.login)
+        app.router.add_post("/api/v1/authentication", self.authentication)
+        app.router.add_get("/api/v1/users/{user_id}/modules", self.list_modules)
+        app.router.add_get("/api/v1/users/{user_id}/modules/{udid}", self.get_module)
+        app.router.add_get("/api/v1/i18n/en", self.language_strings)
+        app.router.add_post("/frontend/send_control_data", self.send_control_data)
+        return app
+
+    async def start(self, host = "127.0.0.1", port = 0):
+        """Start serving, returns the base URL."""
+        self._runner = web.AppRunner(self.application())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}/"
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        resource = request.match_info.route.resource
+        self.requests[f"{request.method} {resource.canonical if resource else request.path}"] += 1
+        latency = self.latency
+        if isinstance(latency, tuple):
+            latency = self._random.uniform(*latency)
+        if latency:
+            await asyncio.sleep(latency)
+        return await handler(request)
+
+    async def login(self, request):
+        return web.json_response(
+            {"authenticated": True, "selectedModuleHash": "mockhash", "selectedModuleIndex": 0},
+            headers={"Set-Cookie": "session=mock; path=/; secure; HttpOnly"},
+        )
+
+    async def authentication(self, request):
+        return web.json_response({"authenticated": True, "user_id": USER_ID, "token": self.token})
+
+    async def list_modules(self, request):
+        if (error := self._error(request)) is not None:
+            return error
+        return web.json_response(self.modules)
+
+    async def get_module(self, request):
+        if (error := self._error(request)) is not None:
+            return error
+        if (data := self.module_data.get(request.match_info["udid"])) is None:
+            return web.Response(status=404, text="Not found")
+        if self.change_rate:
+            self._change(data)
+        return web.json_response(data)
+
+    async def language_strings(self, request):
+        if request.headers.get("If-None-Match") == self.strings_etag:
+            return web.Response(status=304, headers={"ETag": self.strings_etag})
+        return web.Response(
+            body=self.strings_body, content_type="application/json", headers={"ETag": self.strings_etag}
+        )
+
+    async def send_control_data(self, request):
+        if (error := self._error(request)) is not None:
+            return error
+        self.control_data.append(await request.json())
+        return web.json_response({"status": "success"})
+
+    def _error(self, request):
+        """Returns the configured error response or 401 for a wrong token, None otherwise."""
+        if self.error_rate and self._random.random() < self.error_rate:
+            return web.Response(status=self.error_status, text="Mock error")
+        if request.headers.get("Authorization") != "Bearer " + self.token:
+            return web.Response(status=401, text="Unauthorized")
+        return None
+
+    def _change(self, data):
+        for tile in data["tiles"]:
+            if tile["type"] != 6:
+                continue
+            for key, widget in tile["params"].items():
+                if "widget" in key and widget.get("unit") in (6, 7, 8) and self._random.random() < self.change_rate:
+                    widget["value"] += self._random.choice((-1, 1))
+
+
+async def _serve(args):
+    server = MockEmodul(args.modules, args.tiles, args.latency, args.error_rate, change_rate=args.change_rate)
+    url = await server.start(port=args.port)
+    print(f"Mock eMODUL serving {args.modules} modules at {url}, user id {USER_ID}, token {TOKEN}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--modules", type=int, default=2)
+    parser.add_argument("--tiles", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--change-rate", type=float, default=0.01)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,94 @@
+"""Synthetic eMODUL payloads shaped like recorded module data."""
+import random
+
+# txtIds of the labels read by the thermostat, the rest of the dictionary is filler.
+LANGUAGE_STRINGS = {
+    "100": "Heating",
+    "101": "Cooling",
+    "102": "Current temperature",
+    "103": "Set temp.",
+    "104": "Mode",
+    "105": "Automatic mode",
+    "106": "Fan 0-10 V (F)",
+    "107": "Profile",
+    "108": "Weekly schedule",
+    "109": "Controller",
+}
+
+
+def language_strings(size=20000):
+    """Returns a language dictionary with [size] entries."""
+    strings = {str(i): f"Text {i}" for i in range(1000, 1000 + size)}
+    strings.update(LANGUAGE_STRINGS)
+    return strings
+
+
+def _widget(rnd, txt_id=None):
+    unit = rnd.choice((6, 7, 8, 18))
+    value = rnd.randint(1000, 1000 + 19999) if unit == 18 else rnd.randint(0, 300)
+    return {
+        "txtId": txt_id if txt_id is not None else rnd.randint(1000, 20999),
+        "unit": unit,
+        "value": value,
+        "visible": True,
+    }
+
+
+def module_tiles(n_tiles=200, seed=0):
+    """Returns the "tiles" element of a module with [n_tiles] tiles."""
+    rnd = random.Random(seed)
+    tiles = [
+        {"id": 53, "type": 40, "params": {"headerId": 104, "statusId": 100}},
+        {"id": 54, "type": 6, "params": {
+            "widget1": {"txtId": 107, "unit": 18, "value": 108},
+            "widget2": {"txtId": 0, "unit": 0, "value": 0}}},
+        {"id": 58, "type": 6, "params": {
+            "widget1": {"txtId": 102, "unit": 7, "value": 215},
+            "widget2": {"txtId": 103, "unit": 7, "value": 220}}},
+        {"id": 62, "type": 6, "params": {
+            "widget1": {"txtId": 106, "unit": 8, "value": 40},
+            "widget2": {"txtId": 0, "unit": 0, "value": 0}}},
+        {"id": 63, "type": 6, "params": {
+            "widget1": {"txtId": 104, "unit": 18, "value": 105},
+            "widget2": {"txtId": 0, "unit": 0, "value": 0}}},
+        {"id": 70, "type": 50, "params": {"txtId": 109, "controllerName": "VERANO", "version": "1.0.12"}},
+    ]
+    for tile_id in range(100, 100 + max(n_tiles - len(tiles), 0)):
+        tile_type = rnd.choice((6, 6, 6, 40, 50, 1, 31))
+        if tile_type == 6:
+            params = {f"widget{i}": _widget(rnd) for i in range(1, 3)}
+            params["description"] = {"txtId": rnd.randint(1000, 20999)}
+        elif tile_type == 40:
+            params = {"headerId": rnd.randint(1000, 20999), "statusId": rnd.randint(1000, 20999)}
+        elif tile_type == 50:
+            params = {"txtId": 109, "controllerName": "Module", "version": f"1.{tile_id}"}
+        else:
+            params = {"workingStatus": rnd.choice((True, False)), "txtId": rnd.randint(1000, 20999)}
+        tiles.append({"id": tile_id, "type": tile_type, "params": params})
+    return tiles
+
+
+def module_data(n_tiles=200, n_zones=8, seed=0, n_menu=0):
+    """Returns the payload of api/v1/users/{id}/modules/{udid}.
+
+    [n_menu] menu items stand for the sections the integration does not read.
+    """
+    rnd = random.Random(seed)
+    zones = [
+        {
+            "zone": {"id": i, "zoneState": "zoneOn" if i < n_zones else "zoneUnregistered",
+                     "currentTemperature": rnd.randint(150, 250)},
+            "description": {"id": i, "name": f"Zone {i}"},
+        }
+        for i in range(n_zones + 2)
+    ]
+    menu = [
+        {"id": i, "parentId": i // 10, "type": rnd.choice((1, 2, 3, 4)), "txtId": rnd.randint(1000, 20999),
+         "params": {"value": rnd.randint(0, 100), "min": 0, "max": 100, "jump": 1, "unit": 0}}
+        for i in range(n_menu)
+    ]
+    return {
+        "zones": {"elements": zones, "globalSchedules": {"elements": []}},
+        "tiles": module_tiles(n_tiles, seed),
+        "userMenus": {"elements": menu},
+    }
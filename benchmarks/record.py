@@ -0,0 +1,47 @@
+"""Records eMODUL requests and responses of a polling session.
+
+Usage:
+    python benchmarks/record.py --username USER --password PASS --out session.jsonl.gz
+        [--polls 10] [--interval 30] [--base-url https://emodul.eu/]
+
+Logs in, downloads the language dictionary and the module list, then polls
+every module [polls] times. Passwords, the bearer token and cookie values
+are redacted from the recording. Replay the file with benchmarks/replay.py.
+"""
+import argparse
+import asyncio
+
+import _package  # noqa: F401
+from tech_verano.transport import AiohttpTransport, RecordingTransport
+from tech_verano.verano import REQUEST_TIMEOUT, TECH_VERANO, create_session
+
+
+async def main(args):
+    session = create_session()
+    transport = RecordingTransport(AiohttpTransport(session, REQUEST_TIMEOUT), args.out)
+    api = TECH_VERANO(session, base_url=args.base_url, transport=transport)
+    try:
+        if not await api.authenticate(args.username, args.password):
+            raise SystemExit("Authentication failed")
+        await api.language_strings()
+        modules = await api.list_modules()
+        for poll in range(args.polls):
+            for module in modules:
+                await api.get_module_tile_snapshot(module["udid"], max_age=0, max_staleness=0)
+            print(f"Poll {poll + 1}/{args.polls} of {len(modules)} modules recorded")
+            if poll + 1 < args.polls:
+                await asyncio.sleep(args.interval)
+    finally:
+        transport.close()
+        await session.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--polls", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=30)
+    parser.add_argument("--base-url", default=TECH_VERANO.TECH_API_URL)
+    asyncio.run(main(parser.parse_args()))
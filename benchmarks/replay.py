@@ -0,0 +1,63 @@
+"""Replays a recording of benchmarks/record.py through TECH_VERANO.
+
+Usage:
+    python benchmarks/replay.py session.jsonl.gz [--speed 0] [--repeat 100] [--profile]
+
+Polls every recorded module [repeat] times from the recording, offline. With
+--speed the recorded latencies are replayed divided by it (1 = real time,
+0 = no delays), with --profile the decoding is profiled with cProfile.
+"""
+import argparse
+import asyncio
+import cProfile
+import logging
+import pstats
+import time
+
+import _package  # noqa: F401
+from tech_verano.transport import ReplayTransport
+from tech_verano.verano import TECH_VERANO
+
+
+async def main(args):
+    logging.disable(logging.WARNING)
+    transport = ReplayTransport(args.recording, speed=args.speed)
+    # Requests are matched by path, the user id has to be the recorded one.
+    user_id = next(_recorded_user_ids(transport), "0")
+    api = TECH_VERANO(None, user_id, "replay", transport=transport)
+    await api.language_strings()
+    modules = await api.list_modules()
+
+    profile = cProfile.Profile() if args.profile else None
+    start = time.perf_counter()
+    if profile:
+        profile.enable()
+    for _ in range(args.repeat):
+        for module in modules:
+            await api.get_module_tile_snapshot(module["udid"], max_age=0, max_staleness=0)
+    if profile:
+        profile.disable()
+    elapsed = time.perf_counter() - start
+
+    polls = args.repeat * len(modules)
+    print(f"{polls} module polls of {len(modules)} modules in {elapsed:.3f} s, {elapsed / polls * 1e3:.3f} ms/poll")
+    if profile:
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(20)
+
+
+def _recorded_user_ids(transport):
+    """Returns user ids of the recorded module requests."""
+    for key in transport.responses:
+        method, _, path = key.partition(" ")
+        parts = path.strip("/").split("/")
+        if parts[:3] == ["api", "v1", "users"] and len(parts) > 3:
+            yield parts[3]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=0)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--profile", action="store_true")
+    asyncio.run(main(parser.parse_args()))
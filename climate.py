@@ -3,8 +3,16 @@ import logging
 import json
 from typing import List, Optional
 from homeassistant.components.climate import ClimateEntity, ClimateEntityFeature
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.components.climate.const import (
+    ATTR_CURRENT_TEMPERATURE,
+    ATTR_FAN_MODE,
+    ATTR_HVAC_ACTION,
+    ATTR_PRESET_MODE,
     FAN_AUTO,
     FAN_LOW,
     FAN_MEDIUM,
@@ -17,12 +25,12 @@ from homeassistant.const import (
     ATTR_TEMPERATURE,
     UnitOfTemperature
 )
-from .const import DOMAIN
+from .const import DOMAIN, TO_REDACT
+from .decoder import TILE_STATUS, WidgetRecord
+from .verano import TechError
 
 _LOGGER = logging.getLogger(__name__)
 
-MAX_RETRY_SET_COUNT = 3
-
 SUPPORT_FLAGS = (
     ClimateEntityFeature.TARGET_TEMPERATURE
     | ClimateEntityFeature.PRESET_MODE
@@ -49,6 +57,45 @@ THERM_MODES = (
     PRESET_PROTECTION
     )
 
+# Tiles read by the thermostat.
+TILE_HVAC_STATE = 53
+TILE_PROFILE = 54
+TILE_TEMPERATURE = 58
+TILE_FAN = 62
+TILE_FAN_MODE = 63
+
+THERMOSTAT_TILES = frozenset((
+    TILE_HVAC_STATE,
+    TILE_PROFILE,
+    TILE_TEMPERATURE,
+    TILE_FAN,
+    TILE_FAN_MODE
+))
+
+# Labels of the widgets and inscriptions read by the thermostat, resolved to
+# txtIds through the English language dictionary.
+TXT_HEATING = "Heating"
+TXT_COOLING = "Cooling"
+TXT_CURRENT_TEMPERATURE = "Current temperature"
+TXT_SET_TEMPERATURE = "Set temp."
+TXT_MODE = "Mode"
+TXT_AUTOMATIC_MODE = "Automatic mode"
+TXT_FAN = "Fan 0-10 V (F)"
+TXT_PROFILE = "Profile"
+TXT_WEEKLY_SCHEDULE = "Weekly schedule"
+
+TXT_LABELS = (
+    TXT_HEATING,
+    TXT_COOLING,
+    TXT_CURRENT_TEMPERATURE,
+    TXT_SET_TEMPERATURE,
+    TXT_MODE,
+    TXT_AUTOMATIC_MODE,
+    TXT_FAN,
+    TXT_PROFILE,
+    TXT_WEEKLY_SCHEDULE
+)
+
 FAN_MODES = (
     FAN_AUTO,
     FAN_LOW,
@@ -61,36 +108,47 @@ FAN_MODES = (
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up entry."""
 
-    _LOGGER.debug("Setting up entry, module udid: " + config_entry.data["udid"])
+    _LOGGER.debug("Setting up entry, module udid: %s", config_entry.data["udid"])
 
-    TECH_VERANO_OBJ = hass.data[DOMAIN][config_entry.entry_id]
-    devices = await TECH_VERANO_OBJ.list_modules()
-
-    async_add_entities(
-        [
-            TECHVERANOThermostat(
-                device,
-                TECH_VERANO_OBJ,
-                config_entry,
-            )
-            for device in devices
-        ],
-        True,
-    )
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    known_udids = set()
 
+    @callback
+    def async_add_modules():
+        """Add entities of the modules without one."""
 
-class TECHVERANOThermostat(ClimateEntity, RestoreEntity):
+        known_udids.intersection_update(coordinator.module_udids)
+        if not (devices := [device for device in coordinator.modules if device["udid"] not in known_udids]):
+            return
+        known_udids.update(device["udid"] for device in devices)
+        async_add_entities(
+            [
+                TECHVERANOThermostat(
+                    device,
+                    coordinator,
+                    config_entry,
+                )
+                for device in devices
+            ]
+        )
+
+    async_add_modules()
+    config_entry.async_on_unload(coordinator.async_add_listener(async_add_modules))
+
+
+class TECHVERANOThermostat(CoordinatorEntity, ClimateEntity, RestoreEntity):
     """Representation of a Tech-Verano climate."""
 
 
-    def __init__(self, device, TECH_VERANO_OBJ, config):
+    def __init__(self, device, coordinator, config):
         """Initialize the Tech-Verano device."""
 
+        super().__init__(coordinator)
         _LOGGER.debug("Init Tech-Verano Thermostat...")
-        _LOGGER.debug("Config data: %s", str(config.data))
+        _LOGGER.debug("Config data: %s", async_redact_data(config.data, TO_REDACT))
         self._config = config
         self._attr_unique_id = config.entry_id
-        self._TECH_VERANO_OBJ = TECH_VERANO_OBJ
+        self._TECH_VERANO_OBJ = coordinator.api
         self._name = device["name"]
         self._id = device["id"]
         self._udid = device["udid"]
@@ -112,66 +170,145 @@ class TECHVERANOThermostat(ClimateEntity, RestoreEntity):
         self._attr_preset_mode = PRESET_SCHEDULE_WEEKLY
         self._attr_preset_modes = THERM_MODES
 
+        self._txt_ids_cache = {}
+        self._txt_ids_source = None
+        self._last_available = None
+        self.update_properties((coordinator.data or {}).get(self._udid))
+
+
+    async def async_added_to_hass(self):
+        """Restore the last known state until the first refresh completes.
+
+        The first refresh of the coordinator runs in the background, so the
+        entity shows its last state right away instead of delaying startup.
+        """
+
+        await super().async_added_to_hass()
+
+        if (self.coordinator.data or {}).get(self._udid) is not None:
+            return
+        if (last_state := await self.async_get_last_state()) is None:
+            return
 
-    def update_properties(self, module_data):
+        _LOGGER.debug("Restoring Tech VERANO: %s, state: %s", self._name, last_state)
+        attributes = last_state.attributes
+        if last_state.state in self.hvac_modes:
+            self._attr_hvac_mode = HVACMode(last_state.state)
+        if (current_temp := attributes.get(ATTR_CURRENT_TEMPERATURE)) is not None:
+            self._current_temp = current_temp
+        if (target_temp := attributes.get(ATTR_TEMPERATURE)) is not None:
+            self._target_temp = target_temp
+        if attributes.get(ATTR_HVAC_ACTION) in tuple(HVACAction):
+            self._attr_hvac_action = HVACAction(attributes[ATTR_HVAC_ACTION])
+        if attributes.get(ATTR_FAN_MODE) in FAN_MODES:
+            self._attr_fan_mode = attributes[ATTR_FAN_MODE]
+        if attributes.get(ATTR_PRESET_MODE) in THERM_MODES:
+            self._attr_preset_mode = attributes[ATTR_PRESET_MODE]
+
+
+    def update_properties(self, snapshot):
         """ Upadate device properties.
         """
 
         try:
-            _LOGGER.info("Update Tech-Verano Thermostat data started ...")
+            _LOGGER.debug("Update Tech-Verano Thermostat data started ...")
             
-            if module_data:
+            if snapshot:
+                index = snapshot.index
+                txt = self._txt_ids()
                 # HVAC Mode
-                _LOGGER.debug(f"Object module_data: {module_data}")
-                if (hvac_state_data := module_data[53]) is not None:
-                    for i in hvac_state_data:
-                        if "Heating" in i:
-                            self._attr_hvac_mode = HVACMode.HEAT
-                            break
-                        elif "Cooling" in i:
-                            self._attr_hvac_mode = HVACMode.COOL
-                            break
+                _LOGGER.debug("Object module_data: %s", snapshot.tiles)
+                if self._tile_shows(snapshot, TILE_HVAC_STATE, txt.get(TXT_HEATING, ())):
+                    self._attr_hvac_mode = HVACMode.HEAT
+                elif self._tile_shows(snapshot, TILE_HVAC_STATE, txt.get(TXT_COOLING, ())):
+                    self._attr_hvac_mode = HVACMode.COOL
                 # Current Temp       
-                if (temp_data := module_data.get(58)) is not None:
-                    for i in temp_data:
-                        if "Current temperature" in i:
-                            self._current_temp = i[1]
-                            _LOGGER.debug(f"Set current_temp: {i[1]}")
-                            continue
-                        if "Set temp." in i:
-                            self._target_temp = i[1]
-                            _LOGGER.debug(f"Set target_temp: {i[1]}")
-                            continue
+                if (current_temp := self._tile_value(index, TILE_TEMPERATURE, TXT_CURRENT_TEMPERATURE)) is not None:
+                    self._current_temp = current_temp
+                    _LOGGER.debug("Set current_temp: %s", current_temp)
+                if (target_temp := self._tile_value(index, TILE_TEMPERATURE, TXT_SET_TEMPERATURE)) is not None:
+                    self._target_temp = target_temp
+                    _LOGGER.debug("Set target_temp: %s", target_temp)
                 # Fan speed        
-                if (fan_mode_data := module_data.get(63)) is not None:
-                    for i in fan_mode_data:
-                        if "Mode" in i:
-                            if "Automatic mode" in i[1]:
-                                self._current_fan_mode = FAN_AUTO
-                            continue
-
-                if (fan_data := module_data.get(62)) is not None:
-                    for i in fan_data:
-                        if "Fan 0-10 V (F)" in i:
-                            if i[1] == 0:
-                                self._attr_hvac_action = HVACAction.IDLE
-                            else:
-                                self._attr_hvac_action = HVACAction.HEATING
-                            continue
+                if self._tile_value(index, TILE_FAN_MODE, TXT_MODE) in txt.get(TXT_AUTOMATIC_MODE, ()):
+                    self._current_fan_mode = FAN_AUTO
+
+                if (fan := self._tile_value(index, TILE_FAN, TXT_FAN)) is not None:
+                    if fan == 0:
+                        self._attr_hvac_action = HVACAction.IDLE
+                    else:
+                        self._attr_hvac_action = HVACAction.HEATING
                 # Profile
-                if (profile_data := module_data.get(54)) is not None:
-                    for i in profile_data:
-                        if "Profile" in i:
-                            if "Weekly schedule" in i[1]:
-                                self._attr_hvac_mode = HVACMode.AUTO
-                            continue
+                if self._tile_value(index, TILE_PROFILE, TXT_PROFILE) in txt.get(TXT_WEEKLY_SCHEDULE, ()):
+                    self._attr_hvac_mode = HVACMode.AUTO
             else:
                 _LOGGER.debug("No module data, No updates.")
 
         except Exception as e:
-            _LOGGER.error(f"Update Tech-Verano Thermostat data failed. ERROR: {str(e)}")
+            _LOGGER.error("Update Tech-Verano Thermostat data failed. ERROR: %s", e)
+
+
+    def _tile_key(self, index, tile_id, label):
+        """Returns the index key of the tile value labelled [label], if any.
+
+        A label is resolved to every txtId of its text, the tile may use any
+        of them.
+        """
+
+        for txt_id in self._txt_ids().get(label, ()):
+            if (tile_id, txt_id) in index:
+                return (tile_id, txt_id)
+        return None
+
+
+    def _tile_value(self, index, tile_id, label):
+        """Returns the tile value labelled [label], None if there is none."""
+
+        if (key := self._tile_key(index, tile_id, label)) is None:
+            return None
+        return index[key]
+
+
+    @staticmethod
+    def _tile_shows(snapshot, tile_id, txt_ids):
+        """Check if a tile shows one of the given texts.
+
+        The text may be the label of a widget, the header or the status of a
+        text information tile, or the inscription shown by a unit 18 widget.
+        """
+
+        if not txt_ids:
+            return False
+        if snapshot.index.get((tile_id, TILE_STATUS)) in txt_ids:
+            return True
+        if any((tile_id, txt_id) in snapshot.index for txt_id in txt_ids):
+            return True
+        # Widgets of a universal status tile, text is only set for inscriptions.
+        return any(
+            isinstance(widget, WidgetRecord) and widget.text is not None and widget.value in txt_ids
+            for widget in snapshot.tiles.get(tile_id) or ()
+        )
+
+
+    def _txt_ids(self):
+        """Returns txtIds of the labels read by the entity.
+
+        The ids are resolved once per language dictionary, tile values are then
+        looked up by (tile ID, txtId) without using the dictionary.
+        """
+
+        strings = self._TECH_VERANO_OBJ.language_strings_dict
+        if self._txt_ids_source is not strings:
+            self._txt_ids_cache = self._TECH_VERANO_OBJ.language_txt_ids(TXT_LABELS)
+            self._txt_ids_source = strings
+        return self._txt_ids_cache
 
 
+    @property
+    def available(self) -> bool:
+        """Return if the last update of the module succeeded."""
+        return self.coordinator.module_available(self._udid)
+
     @property
     def unique_id(self) -> str:
         """Return a unique ID."""
@@ -227,12 +364,28 @@ class TECHVERANOThermostat(ClimateEntity, RestoreEntity):
         """
         return THERM_MODES
 
-    async def async_update(self):
-        """Call by the Tech device callback to update state."""
-        
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle module data pushed by the coordinator."""
+
+        if self._udid not in self.coordinator.module_udids:
+            _LOGGER.info("Tech VERANO: %s, udid: %s was removed from the account.", self._name, self._udid)
+            registry = er.async_get(self.hass)
+            if registry.async_get(self.entity_id) is not None:
+                registry.async_remove(self.entity_id)
+            else:
+                self.hass.async_create_task(self.async_remove(force_remove=True))
+            return
+
+        available = self.available
+        if available == self._last_available and not self.coordinator.tiles_changed(self._udid, THERMOSTAT_TILES):
+            _LOGGER.debug("No changes of Tech VERANO: %s, udid: %s, id: %s", self._name, self._udid, self._id)
+            return
+
         _LOGGER.debug("Updating Tech VERANO: %s, udid: %s, id: %s", self._name, self._udid, self._id)
-        module_data = await self._TECH_VERANO_OBJ.get_module_tiles(self._udid)
-        self.update_properties(module_data)
+        self._last_available = available
+        self.update_properties((self.coordinator.data or {}).get(self._udid))
+        super()._handle_coordinator_update()
 
     @property
     def temperature_unit(self):
@@ -252,31 +405,39 @@ class TECHVERANOThermostat(ClimateEntity, RestoreEntity):
 
     async def async_set_temperature(self, **kwargs):
         """Set new target temperatures."""
-        _LOGGER.debug("%s [%s] : kwargs %s", self._name, self._id, str(kwargs))
+        _LOGGER.debug("%s [%s] : kwargs %s", self._name, self._id, kwargs)
         temperature = kwargs.get(ATTR_TEMPERATURE)
         _LOGGER.info("%s [%s] : Setting temp to %s", self._name, self._id, temperature)
 
-        count = 0
+        if not temperature:
+            return
 
-        while (True):
-            try:
-                count+=1
-                if temperature:
-                    self._temperature = temperature
-                    r = await self._TECH_VERANO_OBJ.set_const_temp(self._udid, self._id, temperature)
-                    _LOGGER.info("%s [%s] : Setting temp to %s, results: %s.", self._name, self._id, temperature, r)
-                    break
-
-            except Exception as e:
-                if count > 3: 
-                    _LOGGER.error("%s [%s] : Setting temp to %s failed. Error: %s.", self._name, self._id, temperature, e)
-                    break
-                else:
-                    _LOGGER.warning("%s [%s] : Setting temp to %s failed. Trying one more time, Error: %s.", self._name, self._id, temperature, e)
-                    if e.status_code == 401:
-                        _LOGGER.debug("Starting re-auth process.")
-                        r = await self._TECH_VERANO_OBJ.authenticate(self._config.data["user"],self._config.data["pass"])
-                        #r = await self._TECH_VERANO_OBJ.set_const_temp(self._udid, self._id, temperature)
+        self._temperature = temperature
+        try:
+            r = await self._TECH_VERANO_OBJ.set_const_temp(self._udid, self._id, temperature)
+        except TechError as e:
+            # Transient errors and expired tokens were already handled by the Tech API client.
+            _LOGGER.error("%s [%s] : Setting temp to %s failed. Error: %s.", self._name, self._id, temperature, e)
+            return
+
+        _LOGGER.info("%s [%s] : Setting temp to %s, results: %s.", self._name, self._id, temperature, r)
+        self._target_temp = int(temperature * 10) / 10
+        self._write_through(TILE_TEMPERATURE, TXT_SET_TEMPERATURE, self._target_temp)
+        self.coordinator.note_command()
+        # The entity is not polled, its state is written once the command succeeded.
+        self.async_write_ha_state()
+
+
+    def _write_through(self, tile_id, label, value):
+        """Write a value set by a command through to the coordinator data.
+
+        The preset and fan modes are kept by the entity itself, only the tile
+        values read back by update_properties need to be written through.
+        """
+
+        snapshot = (self.coordinator.data or {}).get(self._udid)
+        if snapshot is not None and (key := self._tile_key(snapshot.index, tile_id, label)) is not None:
+            self.coordinator.apply_optimistic(self._udid, {key: value})
 
 
     async def async_set_hvac_mode(self, hvac_mode):
@@ -305,12 +466,10 @@ class TECHVERANOThermostat(ClimateEntity, RestoreEntity):
                 self._attr_preset_mode = preset_mode
                 r = await self._TECH_VERANO_OBJ.set_preset_mode(self._udid, self._id, preset_mode)
                 _LOGGER.info("%s [%s] : Setting present mode to %s, results: %s.", self._name, self._id, preset_mode, r)
-            except Exception as e:
+                self.coordinator.note_command()
+                self.async_write_ha_state()
+            except TechError as e:
                 _LOGGER.error("%s [%s] : Setting present mode to %s failed. Error: %s.", self._name, self._id, preset_mode, e)
-                if e.status_code == 401:
-                    _LOGGER.debug("Starting re-auth process.")
-                    r = await self._TECH_VERANO_OBJ.authenticate(self._config.data["user"],self._config.data["pass"])
-                    r = await self._TECH_VERANO_OBJ.set_preset_mode(self._udid, self._id, preset_mode)
 
     
     async def async_set_fan_mode(self, fan_mode: str):
@@ -329,10 +488,8 @@ class TECHVERANOThermostat(ClimateEntity, RestoreEntity):
                 self._attr_fan_mode = fan_mode
                 r = await self._TECH_VERANO_OBJ.set_fan_mode(self._udid, self._id, fan_mode)
                 _LOGGER.info("%s [%s] : Setting fan mode to %s, results: %s.", self._name, self._id, fan_mode, r)
-            except Exception as e:
+                self.coordinator.note_command()
+                self.async_write_ha_state()
+            except TechError as e:
                 _LOGGER.error("%s [%s] : Setting fan mode to %s failed. Error: %s.", self._name, self._id, fan_mode, e)
-                if e.status_code == 401:
-                    _LOGGER.debug("Starting re-auth process.")
-                    r = await self._TECH_VERANO_OBJ.authenticate(self._config.data["user"],self._config.data["pass"])
-                    r = await self._TECH_VERANO_OBJ.set_fan_mode(self._udid, self._id, fan_mode)
 
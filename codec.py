@@ -0,0 +1,123 @@
+"""JSON codec of the Tech API client.
+
+orjson is used when it is installed, it ships with Home Assistant, otherwise
+the standard json module. Large bodies are decoded in a worker thread so that
+decoding a big module payload or the language dictionary does not block the
+event loop.
+
+Module payloads can be decoded selectively, keeping only the tiles and zones
+read by the integration. Very large payloads are streamed with ijson when it
+is installed, the other sections are then skipped while parsing without
+building Python objects for them. Streaming is several times slower than
+orjson, so smaller payloads are decoded in full and pruned.
+"""
+import asyncio
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Bodies of at least this many bytes are decoded in a worker thread. Below it
+# the hand-off to the executor costs more than decoding on the loop.
+OFFLOAD_THRESHOLD = 64 * 1024
+
+# Module payloads of at least this many bytes are streamed with ijson, which
+# halves the peak memory of the decode at the cost of decoding time.
+STREAM_THRESHOLD = 1024 * 1024
+
+
+class JsonCodec:
+    """Encodes request bodies and decodes response bodies.
+
+    Parameters:
+    offload_threshold (int): Size in bytes from which bodies are decoded in a
+    worker thread, None decodes every body on the event loop.
+    backend (string): "orjson" or "json", the fastest available if not set.
+    stream_threshold (int): Size in bytes from which module payloads are
+    streamed with ijson, None never streams.
+    """
+
+    def __init__(self, offload_threshold = OFFLOAD_THRESHOLD, backend = None,
+                 stream_threshold = STREAM_THRESHOLD):
+        if backend is None:
+            backend = "orjson" if orjson is not None else "json"
+        if backend == "orjson":
+            if orjson is None:
+                raise ValueError("orjson is not installed")
+            self.loads = orjson.loads
+            self.dumps = orjson.dumps
+        elif backend == "json":
+            self.loads = json.loads
+            # One encoder instance, reused for every request body.
+            self.dumps = json.JSONEncoder(separators=(",", ":")).encode
+        else:
+            raise ValueError(f"Unknown JSON backend: {backend}")
+
+        self.backend = backend
+        self.offload_threshold = offload_threshold
+        self.stream_threshold = stream_threshold
+
+    async def decode(self, body):
+        """Decodes a JSON body, in a worker thread if it is large.
+
+        Parameters:
+        body (bytes): The response body.
+
+        Returns:
+        The decoded JSON object.
+        """
+        if self.offload_threshold is not None and len(body) >= self.offload_threshold:
+            return await asyncio.get_running_loop().run_in_executor(None, self.loads, body)
+        return self.loads(body)
+
+    async def decode_module(self, body, tile_types):
+        """Decodes the tiles and zones of a module payload, dropping the rest.
+
+        Parameters:
+        body (bytes): The module payload, see TECH_VERANO.get_module_data.
+        tile_types (set): Types of the tiles to keep.
+
+        Returns:
+        Dictionary with the "tiles" list and the "zones" {"elements"} list.
+        """
+        if self.offload_threshold is not None and len(body) >= self.offload_threshold:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.extract_module, body, tile_types
+            )
+        return self.extract_module(body, tile_types)
+
+    def extract_module(self, body, tile_types):
+        """Synchronous part of decode_module."""
+        if ijson is not None and self.stream_threshold is not None and len(body) >= self.stream_threshold:
+            tiles = [
+                tile for tile in ijson.items(body, "tiles.item", use_float=True)
+                if tile.get("type") in tile_types
+            ]
+            zones = list(ijson.items(body, "zones.elements.item", use_float=True))
+        else:
+            result = self.loads(body)
+            # Both sections may be missing or null.
+            tiles = [tile for tile in result.get("tiles") or () if tile.get("type") in tile_types]
+            zones = (result.get("zones") or {}).get("elements") or []
+        return {"tiles": tiles, "zones": {"elements": zones}}
+
+    def encode(self, obj):
+        """Encodes a request body.
+
+        Parameters:
+        obj (object): JSON serializable object.
+
+        Returns:
+        The JSON document, bytes or string depending on the backend.
+        """
+        return self.dumps(obj)
+
+
+DEFAULT_CODEC = JsonCodec()
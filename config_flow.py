@@ -66,7 +66,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     ) -> FlowResult:
         """Handle the initial step."""
         errors: dict[str, str] = {}
-        _LOGGER.debug(f"ConfigFlow user_input: {str(user_input)}")
+        _LOGGER.debug("ConfigFlow user_input: %s", user_input)
 
         if user_input is not None:
             try:
@@ -1,3 +1,26 @@
 """Constants for the Tech Verano integration."""
 
 DOMAIN = "tech_verano"
+
+DEFAULT_UPDATE_INTERVAL = 30
+
+# Config entry data hidden in logs and diagnostics.
+TO_REDACT = {"pass", "token", "user"}
+
+DATA_I18N = f"{DOMAIN}_i18n"
+I18N_STORAGE_KEY = f"{DOMAIN}.i18n"
+I18N_STORAGE_VERSION = 1
+I18N_REVALIDATE_INTERVAL = 24 * 60 * 60
+
+# Module inventory of a config entry, stored per entry.
+MODULES_STORAGE_KEY = f"{DOMAIN}.modules"
+MODULES_STORAGE_VERSION = 1
+MODULES_REFRESH_INTERVAL = 6 * 60 * 60
+
+# Adaptive polling, intervals in seconds.
+POLL_CONFIRM_INTERVAL = 5
+POLL_CONFIRM_WINDOW = 60
+POLL_IDLE_MAX_INTERVAL = 300
+POLL_ERROR_MAX_INTERVAL = 600
+POLL_STABLE_POLLS = 10
+POLL_BACKOFF_FACTOR = 2
@@ -0,0 +1,195 @@
+"""Update coordinator for the Tech Verano integration."""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+import logging
+
+import aiohttp
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import DEFAULT_UPDATE_INTERVAL, DOMAIN
+from .i18n import TechLanguageCache
+from .inventory import TechModuleInventory
+from .scheduler import AdaptivePollScheduler
+from .verano import TECH_VERANO, TechError
+
+# ----------- GLOBAL ----------- #
+_LOGGER = logging.getLogger(__name__)
+# ----------- GLOBAL ----------- #
+
+
+class TechVeranoCoordinator(DataUpdateCoordinator):
+    """Fetches every module of a config entry once per interval.
+
+    Modules are fetched concurrently, see TECH_VERANO.get_module_tile_snapshots.
+
+    The decoded tiles of each module are shared by all entities subscribed
+    to the coordinator, so the number of requests depends on the number of
+    modules rather than on the number of entities.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: TECH_VERANO, inventory: TechModuleInventory,
+                 language: TechLanguageCache):
+        """Initialize the coordinator."""
+
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=timedelta(seconds=DEFAULT_UPDATE_INTERVAL),
+        )
+        self.api = api
+        self.inventory = inventory
+        self.modules = inventory.modules
+        self.module_udids = frozenset(module["udid"] for module in self.modules)
+        self.language = language
+        self.changes = {}
+        self.failed_modules = frozenset()
+        self.scheduler = AdaptivePollScheduler(DEFAULT_UPDATE_INTERVAL)
+        self._unsub_confirm = None
+
+    async def _async_update_data(self) -> dict:
+        """Fetch tiles of all modules.
+
+        Returns:
+        Dictionary of module tile snapshots indexed by module udid.
+        """
+
+        data = {}
+        changes = {}
+        if (strings := await self.language.async_get(self.api)) is not None:
+            self.api.language_strings_dict = strings
+
+        snapshots, errors = await self.api.get_module_tile_snapshots(
+            self.module_udids, max_age=0, max_staleness=0
+        )
+        if errors and not snapshots:
+            error = next(iter(errors.values()))
+            status_code = getattr(error, "status_code", None)
+            self.changes = dict.fromkeys(self.changes, frozenset())
+            self._set_interval(self.scheduler.note_error(status_code))
+            raise UpdateFailed(f"Error communicating with Tech API: {status_code or error}") from error
+
+        # Failed modules keep their last data and are reported as unavailable.
+        previous = self.data or {}
+        for udid, error in errors.items():
+            _LOGGER.warning("Updating module %s failed, keeping its last data. Error: %s", udid, error)
+        for udid in self.module_udids:
+            if udid in snapshots:
+                data[udid] = snapshots[udid]
+                changes[udid] = snapshots[udid].diff(previous.get(udid))
+            elif udid in previous:
+                data[udid] = previous[udid]
+                changes[udid] = frozenset()
+        self.failed_modules = frozenset(errors)
+
+        self.changes = changes
+        self._set_interval(self.scheduler.note_success(any(changes.values())))
+        return data
+
+    async def async_refresh_modules(self, now = None) -> None:
+        """Refresh the module inventory and reconcile added and removed modules.
+
+        Entities of removed modules remove themselves on the next update,
+        entities of added modules are added by the climate platform.
+        """
+
+        try:
+            added, removed = await self.inventory.async_refresh(self.api)
+        except (TechError, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            # Transport errors are raised as they are once retries are exhausted.
+            _LOGGER.warning("Refreshing the list of modules failed. Error: %s", e)
+            return
+
+        if added or removed:
+            self.async_set_modules(self.inventory.modules)
+        if added:
+            await self.async_request_refresh()
+
+    @callback
+    def async_set_modules(self, modules: list[dict]) -> None:
+        """Replace the polled modules and notify the subscribed entities.
+
+        Parameters:
+        modules (list): The Tech modules.
+        """
+
+        self.modules = modules
+        self.module_udids = udids = frozenset(module["udid"] for module in modules)
+        if self.data is not None:
+            self.data = {udid: snapshot for udid, snapshot in self.data.items() if udid in udids}
+        self.changes = {udid: changed for udid, changed in self.changes.items() if udid in udids}
+        self.async_update_listeners()
+
+    def _set_interval(self, seconds: float) -> None:
+        """Set the interval of the next refresh."""
+
+        if self.update_interval != (interval := timedelta(seconds=seconds)):
+            _LOGGER.debug("Polling interval changed to %s", interval)
+            self.update_interval = interval
+
+    def note_command(self) -> None:
+        """Poll faster for a while to confirm a command took effect.
+
+        The next refresh is requested after the confirmation interval, the
+        refreshes after it follow the shortened update interval.
+        """
+
+        interval = self.scheduler.note_command()
+        self._set_interval(interval)
+        if self._unsub_confirm is not None:
+            self._unsub_confirm()
+        self._unsub_confirm = async_call_later(self.hass, interval, self._async_confirm_command)
+
+    async def _async_confirm_command(self, now) -> None:
+        """Refresh to confirm the last command."""
+
+        self._unsub_confirm = None
+        await self.async_request_refresh()
+
+    async def async_shutdown(self) -> None:
+        """Cancel the pending command confirmation and stop refreshing."""
+
+        if self._unsub_confirm is not None:
+            self._unsub_confirm()
+            self._unsub_confirm = None
+        await super().async_shutdown()
+
+    def apply_optimistic(self, module_udid, values) -> None:
+        """Write values set by a command through to the cached tiles.
+
+        Parameters:
+        module_udid (string): The Tech module udid.
+        values (dict): Typed values indexed by (tile ID, txtId).
+        """
+
+        if (snapshot := self.api.apply_optimistic(module_udid, values)) is None or self.data is None:
+            return
+
+        self.data = {**self.data, module_udid: snapshot}
+        self.changes = {**self.changes, module_udid: {tile_id for tile_id, _ in values}}
+        self.async_update_listeners()
+
+    def module_available(self, module_udid) -> bool:
+        """Check if the last update of the module succeeded.
+
+        Parameters:
+        module_udid (string): The Tech module udid.
+        """
+        return self.last_update_success and module_udid not in self.failed_modules
+
+    def tiles_changed(self, module_udid, tile_ids) -> bool:
+        """Check if any of the given tiles changed in the last update.
+
+        Parameters:
+        module_udid (string): The Tech module udid.
+        tile_ids (set): IDs of the tiles read by an entity.
+
+        Returns:
+        True if at least one of the tiles changed.
+        """
+        changed = self.changes.get(module_udid)
+        return changed is None or not changed.isdisjoint(tile_ids)
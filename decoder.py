@@ -0,0 +1,279 @@
+"""Table-driven decoder of Tech module tiles.
+
+Tile types and widget units are decoded by functions looked up in registries,
+new tile types are added with register_tile_decoder and new units with
+register_unit_converter without touching the decoding loop.
+"""
+from collections import namedtuple
+import sys
+import threading
+from types import MappingProxyType
+
+# Index key of the status of a text information tile (type 40), txtId 0 is never
+# used by a widget.
+TILE_STATUS = 0
+
+# Unit of widgets whose value is an inscription from CN Description Base.
+UNIT_INSCRIPTION = 18
+
+WidgetRecord = namedtuple("WidgetRecord", ("txt_id", "label", "value", "text"))
+"""Widget of a universal status tile, [text] is the inscription for unit 18."""
+
+TextRecord = namedtuple("TextRecord", ("header_id", "status_id", "header", "status"))
+"""Text information tile."""
+
+VersionRecord = namedtuple("VersionRecord", ("txt_id", "label", "controller_name", "version"))
+"""Controller software version tile."""
+
+_MISSING = object()
+
+TILE_DECODERS = {}
+UNIT_CONVERTERS = {}
+
+
+def register_tile_decoder(tile_type):
+    """Register a decoder factory for the given tile type.
+
+    The factory is called once per TileDecoder with the language lookup and
+    the unit converters and returns the function decoding a single tile:
+    decode(tile_id, params, index) -> record.
+    """
+    def register(factory):
+        TILE_DECODERS[tile_type] = factory
+        return factory
+    return register
+
+
+def register_unit_converter(unit):
+    """Register a function converting raw widget values of the given unit."""
+    def register(converter):
+        UNIT_CONVERTERS[unit] = converter
+        return converter
+    return register
+
+
+# Units:
+# - value type = 6: Degrees Celsius.
+# - value type = 7: Tenth degrees Celsius.
+# - value type = 18: Inscription from CN Description Base, or flame brightness in status history [0-8000]
+# - value type = 8: Percentages.
+@register_unit_converter(7)
+def _tenth_degrees(value):
+    return value / 10
+
+
+@register_tile_decoder(6)
+def _universal_status(label, units):
+    """type = 6, Universal status with widgets"""
+    new = tuple.__new__
+    convert_unit = units.get
+
+    def decode(tile_id, params, index):
+        widgets = []
+        for key, widget in params.items():
+            if "widget" in key and (txt_id := widget.get("txtId")) != 0:
+                unit = widget.get("unit")
+                value = widget.get("value")
+                if (convert := convert_unit(unit)) is not None:
+                    value = convert(value)
+                widgets.append(new(WidgetRecord, (txt_id, label(txt_id), value, label(value) if unit == UNIT_INSCRIPTION else None)))
+                index[tile_id, txt_id] = value
+        return tuple(widgets)
+    return decode
+
+
+@register_tile_decoder(40)
+def _text_information(label, units):
+    """type = 40, Text information"""
+    def decode(tile_id, params, index):
+        header_id = params.get("headerId")
+        status_id = params.get("statusId")
+        index[(tile_id, header_id)] = status_id
+        index[(tile_id, TILE_STATUS)] = status_id
+        return TextRecord(header_id, status_id, label(header_id), label(status_id))
+    return decode
+
+
+@register_tile_decoder(50)
+def _software_version(label, units):
+    """type = 50, Controller software version"""
+    def decode(tile_id, params, index):
+        txt_id = params.get("txtId")
+        index[(tile_id, txt_id)] = params.get("version")
+        return VersionRecord(txt_id, label(txt_id), params.get("controllerName"), params.get("version"))
+    return decode
+
+
+def decode_zones(zones):
+    """Decode the zones of a module.
+
+    Parameters:
+    zones (list): The "zones"/"elements" element of the module payload.
+
+    Returns:
+    Dictionary of registered zones indexed by zone ID.
+    """
+    return {
+        zone["zone"]["id"]: zone
+        for zone in zones
+        if zone["zone"]["zoneState"] != "zoneUnregistered"
+    }
+
+
+class TileSnapshot:
+    """Decoded tiles of a module.
+
+    Attributes:
+        tiles - records indexed by tile ID
+        index - typed values indexed by (tile ID, txtId), independent of the language
+        pending - index keys holding values written by a command and not confirmed yet
+    """
+
+    __slots__ = ("tiles", "index", "pending")
+
+    def __init__(self, tiles, index, pending = frozenset()):
+        self.tiles = tiles
+        self.index = index
+        self.pending = pending
+
+    def diff(self, previous):
+        """Returns IDs of tiles changed since the [previous] snapshot.
+
+        Every tile is reported as changed when there is no previous snapshot.
+        Optimistic values only patch the index, so tiles whose pending values
+        were dropped, expired or rejected, are compared by their index values.
+        """
+        if previous is None:
+            return diff_keys(None, self.tiles)
+        changed = diff_keys(previous.tiles, self.tiles)
+        index = self.index
+        previous_index = previous.index
+        for key in previous.pending - self.pending:
+            if previous_index.get(key, _MISSING) != index.get(key, _MISSING):
+                changed.add(key[0])
+        return changed
+
+
+def diff_keys(previous, current):
+    """Returns keys whose values differ between two dictionaries.
+
+    Parameters:
+    previous (dict): The previous values, None if there are none.
+    current (dict): The current values.
+
+    Returns:
+    Set of added, removed and changed keys.
+    """
+    if previous is None:
+        return set(current)
+    changed = {key for key, value in current.items() if previous.get(key, _MISSING) != value}
+    changed.update(key for key in previous if key not in current)
+    return changed
+
+
+class StringTable:
+    """Immutable language dictionary keyed by integer txtIds.
+
+    txtIds in the payload are integers, keying the table by integers saves a
+    str() conversion per lookup. Texts are interned, so repeated texts and
+    texts shared with other tables are stored once. Tables are shared by all
+    instances of the Tech API, see shared_string_table.
+    """
+
+    __slots__ = ("strings", "get")
+
+    def __init__(self, language_strings):
+        table = {}
+        for txt_id, text in (language_strings or {}).items():
+            try:
+                table[int(txt_id)] = sys.intern(text) if type(text) is str else text
+            except ValueError:
+                continue
+        self.strings = MappingProxyType(table)
+        self.get = table.get
+
+    def __len__(self):
+        return len(self.strings)
+
+    def txt_ids(self, labels):
+        """Returns txtIds of the given labels.
+
+        Parameters:
+        labels (iterable): Language strings to look up.
+
+        Returns:
+        Dictionary of frozensets of txtIds indexed by label, a text is often
+        repeated under several txtIds. Labels not found are omitted.
+        """
+        wanted = set(labels)
+        txt_ids = {}
+        for txt_id, label in self.strings.items():
+            if label in wanted:
+                txt_ids.setdefault(label, set()).add(txt_id)
+        return {label: frozenset(ids) for label, ids in txt_ids.items()}
+
+
+_shared_lock = threading.Lock()
+_shared = (None, StringTable(None))
+
+
+def shared_string_table(language_strings):
+    """Returns the process-wide string table of a language dictionary.
+
+    The table built for the last dictionary is reused as long as the
+    dictionary is the same object or has the same content, so all config
+    entries share one table.
+
+    Parameters:
+    language_strings (dict): Language strings indexed by txtId strings.
+
+    Returns:
+    StringTable object.
+    """
+    global _shared
+    source, table = _shared
+    if language_strings is source:
+        return table
+    with _shared_lock:
+        source, table = _shared
+        if language_strings is not source and language_strings != source:
+            table = StringTable(language_strings)
+        _shared = (language_strings, table)
+    return table
+
+
+class TileDecoder:
+    """Decodes the tiles of a module payload.
+
+    The per-type decoders are compiled once for a string table.
+    """
+
+    def __init__(self, strings):
+        if not isinstance(strings, StringTable):
+            strings = shared_string_table(strings)
+        self.strings = strings
+        label = strings.get
+
+        self._decoders = {
+            tile_type: factory(label, UNIT_CONVERTERS)
+            for tile_type, factory in TILE_DECODERS.items()
+        }
+
+    def decode(self, tiles):
+        """Decode the tiles of a module.
+
+        Parameters:
+        tiles (list): The "tiles" element of the module payload.
+
+        Returns:
+        TileSnapshot object.
+        """
+        decoders = self._decoders
+        records = {}
+        index = {}
+        for tile in tiles or ():
+            decode = decoders.get(tile["type"])
+            if decode is not None and (params := tile["params"]) is not None:
+                tile_id = tile["id"]
+                records[tile_id] = decode(tile_id, params, index)
+        return TileSnapshot(records, index)
@@ -0,0 +1,27 @@
+"""Diagnostics support for the Tech Verano integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_I18N, DOMAIN, TO_REDACT
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    api = coordinator.api
+    metrics = api.metrics.as_dict()
+    if (language := hass.data.get(DATA_I18N)) is not None:
+        metrics["caches"]["i18n"] = language.stats.as_dict()
+
+    return {
+        "entry": async_redact_data(entry.data, TO_REDACT),
+        "update_interval": coordinator.update_interval.total_seconds(),
+        "circuit_breaker": api.circuit_breaker.state,
+        "metrics": metrics,
+    }
@@ -0,0 +1,97 @@
+"""Persistent eMODUL language dictionary for the Tech Verano integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import I18N_REVALIDATE_INTERVAL, I18N_STORAGE_KEY, I18N_STORAGE_VERSION
+from .metrics import CacheStats
+from .verano import TECH_VERANO
+
+# ----------- GLOBAL ----------- #
+_LOGGER = logging.getLogger(__name__)
+# ----------- GLOBAL ----------- #
+
+
+class TechLanguageCache:
+    """Language dictionary shared by all config entries.
+
+    The dictionary is kept on disk through HA storage and only revalidated
+    with a conditional request once per [I18N_REVALIDATE_INTERVAL].
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the language cache."""
+
+        self._store = Store(hass, I18N_STORAGE_VERSION, I18N_STORAGE_KEY)
+        self._lock = asyncio.Lock()
+        self._loaded = False
+        self.data = None
+        self.etag = None
+        self.last_modified = None
+        self.fetched = None
+        self.stats = CacheStats()
+
+    async def async_get(self, api: TECH_VERANO) -> dict | None:
+        """Returns the language dictionary, revalidating it if it is outdated.
+
+        Parameters:
+        api (TECH_VERANO): The instance of the Tech API used for revalidation.
+
+        Returns:
+        Dictionary of language strings indexed by txtId.
+        """
+
+        async with self._lock:
+            if not self._loaded:
+                await self._async_load()
+
+            if self.data is None or self.fetched is None or time.time() > self.fetched + I18N_REVALIDATE_INTERVAL:
+                self.stats.misses += 1
+                await self._async_revalidate(api)
+            else:
+                self.stats.hits += 1
+
+        return self.data
+
+    async def _async_load(self):
+        """Load the dictionary stored on disk."""
+
+        if (stored := await self._store.async_load()) is not None:
+            self.data = stored.get("data")
+            self.etag = stored.get("etag")
+            self.last_modified = stored.get("last_modified")
+            self.fetched = stored.get("fetched")
+            _LOGGER.debug("Language strings loaded from storage, fetched: %s", self.fetched)
+        self._loaded = True
+
+    async def _async_revalidate(self, api: TECH_VERANO):
+        """Revalidate the dictionary with a conditional request and store it."""
+
+        strings = await api.language_strings(
+            etag=self.etag if self.data is not None else None,
+            last_modified=self.last_modified if self.data is not None else None
+        )
+        if strings is None:
+            # Keep serving the stored dictionary, retry on the next call.
+            return
+
+        if strings["data"] is not None:
+            _LOGGER.debug("Language strings were modified, updating storage.")
+            self.data = strings["data"]
+        else:
+            _LOGGER.debug("Language strings were not modified.")
+        self.etag = strings["etag"]
+        self.last_modified = strings["last_modified"]
+        self.fetched = time.time()
+
+        await self._store.async_save({
+            "data": self.data,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "fetched": self.fetched
+        })
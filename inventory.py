@@ -0,0 +1,91 @@
+"""Persistent module inventory for the Tech Verano integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import MODULES_REFRESH_INTERVAL, MODULES_STORAGE_KEY, MODULES_STORAGE_VERSION
+from .verano import TECH_VERANO
+
+# ----------- GLOBAL ----------- #
+_LOGGER = logging.getLogger(__name__)
+# ----------- GLOBAL ----------- #
+
+
+class TechModuleInventory:
+    """Modules of a config entry.
+
+    The list of modules is kept on disk through HA storage, so setting up or
+    reloading an entry does not wait for eMODUL. It is only fetched when
+    nothing is stored yet and refreshed in the background once per
+    [MODULES_REFRESH_INTERVAL].
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+        """Initialize the module inventory."""
+
+        self._store = Store(hass, MODULES_STORAGE_VERSION, f"{MODULES_STORAGE_KEY}.{entry.entry_id}")
+        self._lock = asyncio.Lock()
+        self.modules = None
+        self.fetched = None
+
+    @property
+    def outdated(self) -> bool:
+        """True if the inventory is due for a refresh."""
+
+        return self.fetched is None or time.time() > self.fetched + MODULES_REFRESH_INTERVAL
+
+    async def async_load(self, api: TECH_VERANO) -> list[dict]:
+        """Returns the stored modules, fetching them only if nothing is stored.
+
+        Parameters:
+        api (TECH_VERANO): The instance of the Tech API used if nothing is stored.
+
+        Returns:
+        List of modules.
+        """
+
+        if (stored := await self._store.async_load()) is not None:
+            self.modules = stored.get("modules")
+            self.fetched = stored.get("fetched")
+            _LOGGER.debug("Modules loaded from storage, fetched: %s", self.fetched)
+
+        if self.modules is None:
+            await self.async_refresh(api)
+        return self.modules
+
+    async def async_refresh(self, api: TECH_VERANO) -> tuple[list[dict], list[dict]]:
+        """Fetch the modules and store them.
+
+        Parameters:
+        api (TECH_VERANO): The instance of the Tech API.
+
+        Returns:
+        Tuple of the added and the removed modules.
+        """
+
+        async with self._lock:
+            modules = await api.list_modules()
+
+            known = {module["udid"]: module for module in self.modules or ()}
+            current = {module["udid"]: module for module in modules}
+            added = [module for udid, module in current.items() if udid not in known]
+            removed = [module for udid, module in known.items() if udid not in current]
+
+            self.modules = modules
+            self.fetched = time.time()
+            await self._store.async_save({"modules": self.modules, "fetched": self.fetched})
+
+        if added or removed:
+            _LOGGER.debug("Modules changed, added: %s, removed: %s", added, removed)
+        return added, removed
+
+    async def async_remove(self) -> None:
+        """Remove the stored inventory."""
+
+        await self._store.async_remove()
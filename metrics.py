@@ -0,0 +1,115 @@
+"""Request and cache metrics of the Tech API client."""
+import bisect
+import re
+
+# Upper bounds of the latency histogram buckets in seconds.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_ENDPOINT_IDS = (
+    (re.compile(r"users/[^/?]+"), "users/{id}"),
+    (re.compile(r"modules/[^/?]+"), "modules/{udid}"),
+)
+
+
+def endpoint_name(request_path):
+    """Returns the endpoint of a request path, without ids and query."""
+    endpoint = request_path.partition("?")[0]
+    for pattern, name in _ENDPOINT_IDS:
+        endpoint = pattern.sub(name, endpoint)
+    return endpoint
+
+
+class EndpointStats:
+    """Requests of a single endpoint."""
+
+    __slots__ = ("requests", "errors", "bytes_received", "latency_sum", "latency_max", "buckets")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        # One count per bucket of LATENCY_BUCKETS plus one for slower requests.
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, latency, size, error):
+        self.requests += 1
+        self.errors += error
+        self.bytes_received += size
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes_received": self.bytes_received,
+            "latency_avg": self.latency_sum / self.requests if self.requests else None,
+            "latency_max": self.latency_max,
+            "latency_histogram": {
+                **{f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS, self.buckets)},
+                "le_inf": self.buckets[-1],
+            },
+        }
+
+
+class CacheStats:
+    """Hits and misses of a cache.
+
+    Stale hits are served from cache while the value is refreshed in the
+    background. Refreshes are reads that bypass the cache on purpose, like
+    the polls of the coordinator, they are not counted as misses.
+    """
+
+    __slots__ = ("hits", "stale_hits", "misses", "refreshes")
+
+    def __init__(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def as_dict(self):
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+        }
+
+
+class TechMetrics:
+    """Metrics of a TECH_VERANO instance, readable from HA diagnostics."""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.caches = {}
+
+    def record_request(self, method, request_path, latency, size, error):
+        """Record a finished request.
+
+        Parameters:
+        method (string): HTTP method.
+        request_path (string): Requested path, ids are folded into the endpoint name.
+        latency (float): Time to the response body in seconds.
+        size (int): Bytes received.
+        error (bool): Whether the request failed.
+        """
+        key = f"{method} {endpoint_name(request_path)}"
+        if (stats := self.endpoints.get(key)) is None:
+            stats = self.endpoints[key] = EndpointStats()
+        stats.record(latency, size, error)
+
+    def cache(self, name):
+        """Returns the stats of the named cache."""
+        if (stats := self.caches.get(name)) is None:
+            stats = self.caches[name] = CacheStats()
+        return stats
+
+    def as_dict(self):
+        return {
+            "endpoints": {key: stats.as_dict() for key, stats in self.endpoints.items()},
+            "caches": {name: stats.as_dict() for name, stats in self.caches.items()},
+        }
@@ -0,0 +1,88 @@
+"""Retry policy and circuit breaker of the Tech API client."""
+import asyncio
+import random
+import time
+
+import aiohttp
+
+# HTTP statuses worth retrying, other statuses are returned to the caller at once.
+# 429 is not retried, the poll scheduler backs off instead of resending at once.
+RETRYABLE_STATUSES = frozenset((408, 500, 502, 503, 504))
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    Attributes:
+        attempts - maximum number of attempts, including the first one
+        base_delay - delay before the first retry in seconds
+        max_delay - maximum delay between attempts in seconds
+    """
+
+    def __init__(self, attempts = 3, base_delay = 0.5, max_delay = 10):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @staticmethod
+    def is_retryable(error):
+        """Check if the request failing with [error] may succeed when retried."""
+        if isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError)):
+            return True
+        return getattr(error, "status_code", None) in RETRYABLE_STATUSES
+
+    def delay(self, attempt):
+        """Returns the delay in seconds before the retry following [attempt] (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Fails fast while the Tech API keeps failing.
+
+    The circuit opens after [failure_threshold] consecutive retryable failures.
+    After [reset_timeout] seconds one probe request is let through, its result
+    closes the circuit or opens it again.
+    """
+
+    def __init__(self, failure_threshold = 5, reset_timeout = 60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = None
+        self._probing = False
+
+    @property
+    def state(self):
+        """Returns "closed", "open" or "half_open"."""
+        if self.opened is None:
+            return "closed"
+        if self._probing or time.monotonic() >= self.opened + self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow_request(self):
+        """Check if a request may be sent."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        """Close the circuit."""
+        self.failures = 0
+        self.opened = None
+        self._probing = False
+
+    def release_probe(self):
+        """Let another probe through when the current one ended without an outcome."""
+        self._probing = False
+
+    def record_failure(self):
+        """Count a retryable failure, opening the circuit at the threshold."""
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened = time.monotonic()
+        self._probing = False
@@ -0,0 +1,91 @@
+"""Adaptive polling scheduler for the Tech Verano integration."""
+from __future__ import annotations
+
+import time
+
+from .const import (
+    DEFAULT_UPDATE_INTERVAL,
+    POLL_BACKOFF_FACTOR,
+    POLL_CONFIRM_INTERVAL,
+    POLL_CONFIRM_WINDOW,
+    POLL_ERROR_MAX_INTERVAL,
+    POLL_IDLE_MAX_INTERVAL,
+    POLL_STABLE_POLLS,
+)
+
+
+class AdaptivePollScheduler:
+    """Chooses the polling interval from activity and server feedback.
+
+    - Polls every [confirm_interval] seconds for [confirm_window] seconds after
+      a command, to confirm it took effect.
+    - Backs off up to [idle_max_interval] when [stable_polls] polls in a row
+      brought no changes.
+    - Backs off up to [error_max_interval] while the server answers with
+      HTTP 429 or 5xx.
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_UPDATE_INTERVAL,
+        confirm_interval: float = POLL_CONFIRM_INTERVAL,
+        confirm_window: float = POLL_CONFIRM_WINDOW,
+        idle_max_interval: float = POLL_IDLE_MAX_INTERVAL,
+        error_max_interval: float = POLL_ERROR_MAX_INTERVAL,
+        stable_polls: int = POLL_STABLE_POLLS,
+        backoff_factor: float = POLL_BACKOFF_FACTOR,
+    ):
+        self.interval = interval
+        self.confirm_interval = confirm_interval
+        self.confirm_window = confirm_window
+        self.idle_max_interval = idle_max_interval
+        self.error_max_interval = error_max_interval
+        self.stable_polls = stable_polls
+        self.backoff_factor = backoff_factor
+
+        self._confirm_until = 0.0
+        self._unchanged = 0
+        self._idle_interval = interval
+        self._error_interval = None
+
+    def note_command(self) -> float:
+        """Record a command sent to the controller, returns the next interval."""
+        self._confirm_until = time.monotonic() + self.confirm_window
+        self._unchanged = 0
+        self._idle_interval = self.interval
+        return self.next_interval()
+
+    def note_success(self, changed: bool) -> float:
+        """Record a successful poll, returns the next interval.
+
+        Parameters:
+        changed (bool): Whether the poll brought any changes.
+        """
+        self._error_interval = None
+        if changed:
+            self._unchanged = 0
+            self._idle_interval = self.interval
+        else:
+            self._unchanged += 1
+            if self._unchanged >= self.stable_polls:
+                self._idle_interval = min(self._idle_interval * self.backoff_factor, self.idle_max_interval)
+        return self.next_interval()
+
+    def note_error(self, status_code) -> float:
+        """Record a failed poll, returns the next interval.
+
+        Parameters:
+        status_code (int): HTTP status returned by the Tech API, None if unknown.
+        """
+        if status_code == 429 or (isinstance(status_code, int) and status_code >= 500):
+            previous = self._error_interval or self.interval
+            self._error_interval = min(previous * self.backoff_factor, self.error_max_interval)
+        return self.next_interval()
+
+    def next_interval(self) -> float:
+        """Returns the polling interval in seconds."""
+        if self._error_interval is not None:
+            return self._error_interval
+        if time.monotonic() < self._confirm_until:
+            return self.confirm_interval
+        return self._idle_interval
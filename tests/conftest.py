@@ -0,0 +1,11 @@
+"""Test configuration.
+
+Imports the integration modules the same way as the benchmarks, see
+benchmarks/_package.py.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import _package  # noqa: E402,F401
@@ -0,0 +1,123 @@
+"""Tests of the token refresh of the Tech API client."""
+import asyncio
+import json
+
+import pytest
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from tech_verano.transport import TransportResponse
+from tech_verano.verano import TECH_VERANO, TechError
+
+
+def response(status, document):
+    body = json.dumps(document).encode() if status == 200 else b"Unauthorized"
+    return TransportResponse(status, CIMultiDictProxy(CIMultiDict()), body)
+
+
+class AuthTransport:
+    """Accepts the bearer token [valid] and issues it on login.
+
+    GET requests of "slow" paths take longer, so that their 401 arrives after
+    the token was already refreshed.
+    """
+
+    cookie_jar = None
+
+    def __init__(self, valid = "new", login_ok = True):
+        self.valid = valid
+        self.login_ok = login_ok
+        self.logins = 0
+        self.requests = []
+
+    async def request(self, method, url, headers, data = None):
+        if method == "POST":
+            assert "Authorization" not in headers
+            if url.endswith("frontend/login"):
+                self.logins += 1
+            # Concurrent callers run into the authentication in flight.
+            await asyncio.sleep(0.01)
+            if not self.login_ok:
+                return response(401, None)
+            if url.endswith("frontend/login"):
+                return response(200, {"authenticated": True, "selectedModuleHash": "hash", "selectedModuleIndex": 0})
+            return response(200, {"authenticated": True, "user_id": 1, "token": self.valid})
+
+        token = headers.get("Authorization")
+        self.requests.append((url.rsplit("/", 1)[-1], token))
+        await asyncio.sleep(0.05 if "slow" in url else 0)
+        if token != "Bearer " + self.valid:
+            return response(401, None)
+        return response(200, {"path": url})
+
+
+def make_api(transport, **kwargs):
+    return TECH_VERANO(None, "1", "old", username="user", password="pass", transport=transport, **kwargs)
+
+
+def get(api, path):
+    return api.tech_get(request_path=path, headers=api.headers)
+
+
+def test_concurrent_401s_share_one_authentication():
+    transport = AuthTransport()
+    refreshed = []
+    api = make_api(transport, on_token_refresh=lambda user_id, token: refreshed.append((user_id, token)))
+
+    async def main():
+        return await asyncio.gather(get(api, "a"), get(api, "b"), get(api, "slow"))
+
+    results = asyncio.run(main())
+    assert [result["path"] for result in results] == [
+        "https://emodul.eu/a", "https://emodul.eu/b", "https://emodul.eu/slow"
+    ]
+    assert transport.logins == 1
+    assert refreshed == [("1", "new")]
+    assert api.headers["Authorization"] == "Bearer new"
+
+
+def test_rejected_request_is_retried_once_with_the_new_token():
+    transport = AuthTransport()
+    api = make_api(transport)
+
+    asyncio.run(get(api, "a"))
+
+    assert transport.requests == [("a", "Bearer old"), ("a", "Bearer new")]
+
+
+def test_401_after_a_refresh_does_not_authenticate_again():
+    transport = AuthTransport()
+    api = make_api(transport)
+
+    async def main():
+        slow = asyncio.ensure_future(get(api, "slow"))
+        # Refreshes the token while the slow request still carries the old one.
+        await get(api, "a")
+        return await slow
+
+    asyncio.run(main())
+    assert transport.logins == 1
+    assert transport.requests[-1] == ("slow", "Bearer new")
+
+
+def test_rejected_login_does_not_recurse():
+    transport = AuthTransport(login_ok=False)
+    refreshed = []
+    api = make_api(transport, on_token_refresh=lambda user_id, token: refreshed.append((user_id, token)))
+
+    with pytest.raises(TechError) as error:
+        asyncio.run(get(api, "a"))
+
+    assert error.value.status_code == 401
+    assert transport.logins == 1
+    assert transport.requests == [("a", "Bearer old")]
+    assert refreshed == []
+
+
+def test_401_without_credentials_is_raised():
+    transport = AuthTransport()
+    api = TECH_VERANO(None, "1", "old", transport=transport)
+
+    with pytest.raises(TechError):
+        asyncio.run(get(api, "a"))
+
+    assert transport.logins == 0
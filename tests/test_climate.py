@@ -0,0 +1,91 @@
+"""Tests of the thermostat entity, run where Home Assistant is installed."""
+import asyncio
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from tech_verano.climate import TECHVERANOThermostat  # noqa: E402
+
+DEVICE = {"id": 1, "udid": "udid", "version": "1.0", "name": "Verano"}
+
+
+class FakeApi:
+    """Accepts every command."""
+
+    language_strings_dict = {}
+
+    def language_txt_ids(self, labels):
+        return {}
+
+    async def set_const_temp(self, module_udid, selectedModuleIndex, target_temp):
+        return {}
+
+    async def set_preset_mode(self, module_udid, selectedModuleIndex, preset_mode):
+        return {}
+
+    async def set_fan_mode(self, module_udid, selectedModuleIndex, fan_mode):
+        return {}
+
+
+class FakeCoordinator:
+    """Coordinator without data, commands find nothing to write through."""
+
+    def __init__(self):
+        self.api = FakeApi()
+        self.data = None
+        self.commands = 0
+
+    def async_add_listener(self, update_callback, context = None):
+        return lambda: None
+
+    def note_command(self):
+        self.commands += 1
+
+
+class FakeEntry:
+    entry_id = "entry"
+    data = {}
+
+
+def make_thermostat():
+    thermostat = TECHVERANOThermostat(DEVICE, FakeCoordinator(), FakeEntry())
+    thermostat.writes = []
+    thermostat.async_write_ha_state = lambda: thermostat.writes.append((
+        thermostat.target_temperature, thermostat.preset_mode, thermostat.fan_mode
+    ))
+    return thermostat
+
+
+def test_set_temperature_writes_state():
+    thermostat = make_thermostat()
+
+    asyncio.run(thermostat.async_set_temperature(temperature=23.46))
+
+    assert thermostat.writes == [(23.4, thermostat.preset_mode, thermostat.fan_mode)]
+    assert thermostat.coordinator.commands == 1
+
+
+def test_set_preset_mode_writes_state():
+    thermostat = make_thermostat()
+
+    asyncio.run(thermostat.async_set_preset_mode("eco"))
+
+    assert [preset_mode for _, preset_mode, _ in thermostat.writes] == ["eco"]
+
+
+def test_set_fan_mode_writes_state():
+    thermostat = make_thermostat()
+
+    asyncio.run(thermostat.async_set_fan_mode("low"))
+
+    assert [fan_mode for _, _, fan_mode in thermostat.writes] == ["low"]
+
+
+def test_unchanged_fan_mode_sends_nothing():
+    thermostat = make_thermostat()
+
+    asyncio.run(thermostat.async_set_fan_mode(thermostat.fan_mode))
+
+    assert thermostat.writes == []
+    assert thermostat.coordinator.commands == 0
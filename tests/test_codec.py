@@ -0,0 +1,46 @@
+"""Tests of the JSON codec of the Tech API client."""
+import json
+
+import pytest
+
+from tech_verano import codec as codec_module
+from tech_verano.codec import JsonCodec
+
+TILE_TYPES = frozenset((6, 40, 50))
+
+DOCUMENT = {
+    "tiles": [
+        {"id": 1, "type": 6, "params": {}},
+        {"id": 2, "type": 31, "params": {}},
+        {"id": 3, "type": 40, "params": {}},
+    ],
+    "zones": {"elements": [{"zone": {"id": 1}}], "globalSchedules": {}},
+    "userMenus": {"elements": [{"id": 1}]},
+}
+
+
+def codecs():
+    yield JsonCodec(stream_threshold=None)
+    if codec_module.ijson is not None:
+        yield JsonCodec(stream_threshold=0)
+
+
+@pytest.mark.parametrize("codec", list(codecs()))
+def test_extract_module_keeps_known_tiles_and_zones(codec):
+    result = codec.extract_module(json.dumps(DOCUMENT).encode(), TILE_TYPES)
+    assert [tile["id"] for tile in result["tiles"]] == [1, 3]
+    assert result["zones"] == {"elements": [{"zone": {"id": 1}}]}
+    assert set(result) == {"tiles", "zones"}
+
+
+@pytest.mark.parametrize("codec", list(codecs()))
+@pytest.mark.parametrize("document", [{}, {"tiles": None, "zones": None}, {"tiles": [], "zones": {"elements": None}}])
+def test_extract_module_without_sections(codec, document):
+    result = codec.extract_module(json.dumps(document).encode(), TILE_TYPES)
+    assert result == {"tiles": [], "zones": {"elements": []}}
+
+
+def test_encode_decode_roundtrip():
+    codec = JsonCodec(offload_threshold=None)
+    data = [{"ido": 1, "params": 215, "module_index": 0}]
+    assert json.loads(codec.encode(data)) == data
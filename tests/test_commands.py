@@ -0,0 +1,137 @@
+"""Tests of the debounced control commands of the Tech API client."""
+import asyncio
+import json
+
+import pytest
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from tech_verano.transport import TransportResponse
+from tech_verano.verano import TECH_VERANO, TechError
+
+DELAY = 0.05
+
+
+class CommandTransport:
+    """Records the POSTed command batches and answers them with [status]."""
+
+    cookie_jar = None
+
+    def __init__(self, status = 200):
+        self.status = status
+        self.batches = []
+
+    async def request(self, method, url, headers, data = None):
+        self.batches.append(json.loads(data))
+        body = b'{"result": "ok"}' if self.status == 200 else b"Bad Request"
+        return TransportResponse(self.status, CIMultiDictProxy(CIMultiDict()), body)
+
+
+def make_api(status = 200):
+    return TECH_VERANO(None, "1", "token", command_delay=DELAY, transport=CommandTransport(status))
+
+
+def command(ido, params):
+    return {"ido": ido, "params": params, "module_index": 0}
+
+
+def test_commands_within_the_delay_are_sent_in_one_batch():
+    api = make_api()
+
+    async def main():
+        first = asyncio.ensure_future(api.send_control_data("udid", [command(139, 215)]))
+        await asyncio.sleep(DELAY / 2)
+        second = asyncio.ensure_future(api.send_control_data("udid", [command(100, 6)]))
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(main()) == [{"result": "ok"}] * 2
+    assert api.transport.batches == [[command(139, 215), command(100, 6)]]
+
+
+def test_later_command_replaces_queued_command_with_same_ido():
+    api = make_api()
+
+    async def main():
+        await asyncio.gather(
+            api.send_control_data("udid", [command(139, 215), command(100, 6)]),
+            api.send_control_data("udid", [command(139, 230)]),
+        )
+
+    asyncio.run(main())
+    assert api.transport.batches == [[command(100, 6), command(139, 230)]]
+
+
+def test_debounce_waits_for_the_last_command():
+    api = make_api()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        first = asyncio.ensure_future(api.send_control_data("udid", [command(139, 215)]))
+        await asyncio.sleep(DELAY * 0.8)
+        assert api.transport.batches == []
+        await api.send_control_data("udid", [command(139, 220)])
+        await first
+        return loop.time() - start
+
+    # The second command restarted the delay.
+    assert asyncio.run(main()) >= DELAY * 1.8
+    assert api.transport.batches == [[command(139, 220)]]
+
+
+def test_modules_and_later_batches_are_sent_separately():
+    api = make_api()
+
+    async def main():
+        await asyncio.gather(
+            api.send_control_data("first", [command(139, 215)]),
+            api.send_control_data("second", [command(139, 215)]),
+        )
+        await api.send_control_data("first", [command(100, 6)])
+
+    asyncio.run(main())
+    assert len(api.transport.batches) == 3
+
+
+def test_error_reaches_every_caller_of_the_batch():
+    api = make_api(status=400)
+
+    async def main():
+        return await asyncio.gather(
+            api.send_control_data("udid", [command(139, 215)]),
+            api.send_control_data("udid", [command(100, 6)]),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(main())
+    assert [type(result) for result in results] == [TechError, TechError]
+    assert all(result.status_code == 400 for result in results)
+    assert len(api.transport.batches) == 1
+
+
+def test_cancelled_caller_does_not_cancel_the_batch():
+    api = make_api()
+
+    async def main():
+        first = asyncio.ensure_future(api.send_control_data("udid", [command(139, 215)]))
+        second = asyncio.ensure_future(api.send_control_data("udid", [command(100, 6)]))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == {"result": "ok"}
+    assert api.transport.batches == [[command(139, 215), command(100, 6)]]
+
+
+def test_queued_commands_of_a_cancelled_caller_are_still_sent():
+    api = make_api()
+
+    async def main():
+        first = asyncio.ensure_future(api.send_control_data("udid", [command(139, 215)]))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await asyncio.sleep(DELAY * 2)
+
+    asyncio.run(main())
+    assert api.transport.batches == [[command(139, 215)]]
@@ -0,0 +1,64 @@
+"""Tests of the cookie handling of the Tech API client."""
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from tech_verano.transport import TransportResponse
+from tech_verano.verano import TECH_VERANO
+
+
+class RecordingJar:
+    """Cookie jar recording the names of the updated cookies."""
+
+    def __init__(self):
+        self.updates = []
+
+    def update_cookies(self, cookies):
+        self.updates.append(sorted(cookies))
+
+
+class JarTransport:
+    def __init__(self):
+        self.cookie_jar = RecordingJar()
+
+
+def response(*set_cookies):
+    headers = CIMultiDict([("Content-Type", "application/json")] + [("Set-Cookie", c) for c in set_cookies])
+    return TransportResponse(200, CIMultiDictProxy(headers), b"{}")
+
+
+def make_api():
+    return TECH_VERANO(None, "1", "token", transport=JarTransport())
+
+
+def test_unchanged_session_cookie_is_skipped():
+    api = make_api()
+    api.update_cookies(response("XSRF-TOKEN=abc; path=/; secure"))
+    api.update_cookies(response("XSRF-TOKEN=abc; path=/; secure"))
+    assert api.transport.cookie_jar.updates == [["XSRF-TOKEN"]]
+
+
+def test_changed_cookie_is_stored():
+    api = make_api()
+    api.update_cookies(response("XSRF-TOKEN=abc; path=/"))
+    api.update_cookies(response("XSRF-TOKEN=def; path=/"))
+    assert api.transport.cookie_jar.updates == [["XSRF-TOKEN"], ["XSRF-TOKEN"]]
+
+
+def test_resent_cookie_with_max_age_is_extended():
+    api = make_api()
+    api.update_cookies(response("session=abc; Max-Age=3600; path=/"))
+    api.update_cookies(response("session=abc; Max-Age=3600; path=/"))
+    assert api.transport.cookie_jar.updates == [["session"], ["session"]]
+
+
+def test_resent_cookie_with_same_expires_is_skipped():
+    api = make_api()
+    api.update_cookies(response("session=abc; expires=Fri, 17 Oct 2036 10:00:00 GMT; path=/"))
+    api.update_cookies(response("session=abc; expires=Fri, 17 Oct 2036 10:00:00 GMT; path=/"))
+    api.update_cookies(response("session=abc; expires=Sat, 18 Oct 2036 10:00:00 GMT; path=/"))
+    assert api.transport.cookie_jar.updates == [["session"], ["session"]]
+
+
+def test_response_without_cookies():
+    api = make_api()
+    api.update_cookies(response())
+    assert api.transport.cookie_jar.updates == []
@@ -0,0 +1,48 @@
+"""Tests of the tile decoder and the string table."""
+from tech_verano.decoder import StringTable, TileDecoder, TileSnapshot
+
+LANGUAGE_STRINGS = {"102": "Current temperature", "103": "Set temp.", "203": "Set temp.", "104": "Mode"}
+
+TILES = [
+    {"id": 58, "type": 6, "params": {
+        "widget1": {"txtId": 102, "unit": 7, "value": 215},
+        "widget2": {"txtId": 103, "unit": 7, "value": 220}}},
+    {"id": 63, "type": 6, "params": {
+        "widget1": {"txtId": 104, "unit": 18, "value": 102}}},
+]
+
+
+def decode():
+    return TileDecoder(LANGUAGE_STRINGS).decode(TILES)
+
+
+def test_txt_ids_resolve_every_id_of_a_label():
+    txt_ids = StringTable(LANGUAGE_STRINGS).txt_ids(["Set temp.", "Mode", "Missing"])
+    assert txt_ids == {"Set temp.": frozenset((103, 203)), "Mode": frozenset((104,))}
+
+
+def test_decode_indexes_values_and_inscriptions():
+    snapshot = decode()
+    assert snapshot.index[(58, 102)] == 21.5
+    assert snapshot.index[(63, 104)] == 102
+    assert snapshot.tiles[63][0].text == "Current temperature"
+
+
+def test_diff_reports_changed_tiles():
+    previous = decode()
+    assert decode().diff(previous) == set()
+    assert decode().diff(None) == {58, 63}
+
+
+def test_diff_reports_tiles_of_dropped_pending_values():
+    previous = decode()
+    patched = TileSnapshot(previous.tiles, {**previous.index, (58, 103): 23.0}, frozenset({(58, 103)}))
+
+    # The pending value expired or was rejected, the server value is back.
+    assert decode().diff(patched) == {58}
+
+
+def test_diff_ignores_confirmed_pending_values():
+    previous = decode()
+    patched = TileSnapshot(previous.tiles, {**previous.index, (58, 103): 22.0}, frozenset({(58, 103)}))
+    assert decode().diff(patched) == set()
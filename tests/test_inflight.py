@@ -0,0 +1,86 @@
+"""Tests of the shared in-flight GET requests of the Tech API client."""
+import asyncio
+
+import pytest
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from tech_verano.transport import TransportResponse
+from tech_verano.verano import TECH_VERANO
+
+
+class GatedTransport:
+    """Answers GET requests once [release] is set, counting them per URL."""
+
+    cookie_jar = None
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.requests = []
+
+    async def request(self, method, url, headers, data = None):
+        self.requests.append(url)
+        await self.release.wait()
+        return TransportResponse(200, CIMultiDictProxy(CIMultiDict()), b'{"ok": true}')
+
+
+def get(api, path, headers = None):
+    return api.tech_get(request_path=path, headers=headers or api.headers)
+
+
+def test_concurrent_identical_gets_send_one_request():
+    async def main():
+        api = TECH_VERANO(None, "1", "token", transport=GatedTransport())
+        callers = [asyncio.ensure_future(get(api, "a")) for _ in range(3)]
+        await asyncio.sleep(0)
+        api.transport.release.set()
+        results = await asyncio.gather(*callers)
+        return api, results
+
+    api, results = asyncio.run(main())
+    assert results == [{"ok": True}] * 3
+    assert api.transport.requests == ["https://emodul.eu/a"]
+    assert api.inflight == {}
+
+
+def test_different_requests_are_not_shared():
+    async def main():
+        api = TECH_VERANO(None, "1", "token", transport=GatedTransport())
+        callers = [
+            asyncio.ensure_future(get(api, "a")),
+            asyncio.ensure_future(get(api, "b")),
+            asyncio.ensure_future(get(api, "a", {**api.headers, "If-None-Match": "etag"})),
+        ]
+        await asyncio.sleep(0)
+        api.transport.release.set()
+        await asyncio.gather(*callers)
+        return api
+
+    assert len(asyncio.run(main()).transport.requests) == 3
+
+
+def test_cancelled_caller_leaves_the_request_to_the_others():
+    async def main():
+        api = TECH_VERANO(None, "1", "token", transport=GatedTransport())
+        first = asyncio.ensure_future(get(api, "a"))
+        second = asyncio.ensure_future(get(api, "a"))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        api.transport.release.set()
+        return api, await second
+
+    api, result = asyncio.run(main())
+    assert result == {"ok": True}
+    assert api.transport.requests == ["https://emodul.eu/a"]
+
+
+def test_finished_request_is_sent_again():
+    async def main():
+        api = TECH_VERANO(None, "1", "token", transport=GatedTransport())
+        api.transport.release.set()
+        await get(api, "a")
+        await get(api, "a")
+        return api
+
+    assert len(asyncio.run(main()).transport.requests) == 2
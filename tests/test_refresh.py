@@ -0,0 +1,168 @@
+"""Tests of the module cache of the Tech API client."""
+import asyncio
+import json
+
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from tech_verano.transport import TransportResponse
+from tech_verano.verano import TECH_VERANO
+
+LANGUAGE_STRINGS = {"102": "Current temperature", "103": "Set temp."}
+
+TILES = [
+    {"id": 58, "type": 6, "params": {
+        "widget1": {"txtId": 102, "unit": 7, "value": 215},
+        "widget2": {"txtId": 103, "unit": 7, "value": 220}}},
+]
+
+
+class StaticTransport:
+    """Answers every request with the same JSON document."""
+
+    cookie_jar = None
+
+    def __init__(self, document):
+        self.body = json.dumps(document).encode()
+
+    async def request(self, method, url, headers, data = None):
+        return TransportResponse(200, CIMultiDictProxy(CIMultiDict()), self.body)
+
+
+def make_api(document):
+    api = TECH_VERANO(None, "1", "token", transport=StaticTransport(document))
+    api.language_strings_dict = LANGUAGE_STRINGS
+    return api
+
+
+def refresh(api):
+    async def main():
+        tiles = await api.get_module_tile_snapshot("udid", max_age=0, max_staleness=0)
+        zones = await api.get_module_zones("udid")
+        return tiles, zones
+    return asyncio.run(main())
+
+
+def test_refresh_fills_tiles_and_zones():
+    zone = {"zone": {"id": 1, "zoneState": "zoneOn"}, "description": {"id": 1}}
+    snapshot, zones = refresh(make_api({"tiles": TILES, "zones": {"elements": [zone]}}))
+    assert snapshot.index[(58, 103)] == 22.0
+    assert zones == {1: zone}
+
+
+def test_refresh_without_zones():
+    for document in ({"tiles": TILES}, {"tiles": TILES, "zones": None}, {"tiles": TILES, "zones": {"elements": None}}):
+        snapshot, zones = refresh(make_api(document))
+        assert snapshot.index[(58, 102)] == 21.5
+        assert zones == {}
+
+
+class FailingModuleTransport(StaticTransport):
+    """Answers 404 for the module [failing], the document for the others."""
+
+    def __init__(self, document, failing):
+        super().__init__(document)
+        self.failing = failing
+
+    async def request(self, method, url, headers, data = None):
+        if url.endswith("/" + self.failing):
+            return TransportResponse(404, CIMultiDictProxy(CIMultiDict()), b"Not Found")
+        return await super().request(method, url, headers, data)
+
+
+def test_snapshots_of_good_modules_survive_a_failing_module():
+    api = make_api({"tiles": TILES})
+    api.transport = FailingModuleTransport({"tiles": TILES}, "broken")
+
+    snapshots, errors = asyncio.run(
+        api.get_module_tile_snapshots(["good", "broken", "other"], max_age=0, max_staleness=0)
+    )
+    assert set(snapshots) == {"good", "other"}
+    assert snapshots["good"].index[(58, 103)] == 22.0
+    assert set(errors) == {"broken"}
+    assert errors["broken"].status_code == 404
+
+
+class GatedTransport(StaticTransport):
+    """Answers with the document once [release] is set, counting the requests."""
+
+    def __init__(self, document):
+        super().__init__(document)
+        self.release = asyncio.Event()
+        self.release.set()
+        self.requests = 0
+
+    async def request(self, method, url, headers, data = None):
+        self.requests += 1
+        await self.release.wait()
+        return await super().request(method, url, headers, data)
+
+
+def make_stale_api(age):
+    """Returns an API with cached tiles [age] seconds old, the next fetch is held."""
+    api = make_api({"tiles": TILES})
+    api.transport = GatedTransport({"tiles": TILES})
+    api.max_staleness = 300
+    asyncio.run(api.get_module_tile_snapshot("udid"))
+    api.cache_entry("udid", "tiles").updated -= age
+    api.transport.release = asyncio.Event()
+    return api
+
+
+def test_stale_hit_returns_without_waiting():
+    api = make_stale_api(60)
+    stale = api.cache_entry("udid", "tiles").value
+
+    async def main():
+        snapshot = await asyncio.wait_for(api.get_module_tile_snapshot("udid"), 0.1)
+        assert snapshot is stale
+        assert set(api.revalidations) == {"udid"}
+        api.transport.release.set()
+        await api.revalidations["udid"]
+
+    asyncio.run(main())
+    assert api.transport.requests == 2
+    assert api.cache_entry("udid", "tiles").value is not stale
+    assert api.cache_entry("udid", "tiles").is_fresh()
+    assert api.revalidations == {}
+
+
+def test_one_revalidation_per_module():
+    api = make_stale_api(60)
+
+    async def main():
+        await asyncio.gather(*(api.get_module_tile_snapshot("udid") for _ in range(3)))
+        revalidation = api.revalidations["udid"]
+        api.transport.release.set()
+        await revalidation
+
+    asyncio.run(main())
+    assert api.transport.requests == 2
+
+
+def test_value_past_max_staleness_waits_for_the_refresh():
+    api = make_stale_api(600)
+    stale = api.cache_entry("udid", "tiles").value
+
+    async def main():
+        request = asyncio.ensure_future(api.get_module_tile_snapshot("udid"))
+        await asyncio.sleep(0.05)
+        assert not request.done()
+        api.transport.release.set()
+        return await request
+
+    snapshot = asyncio.run(main())
+    assert snapshot is not stale
+    assert api.revalidations == {}
+    assert api.transport.requests == 2
+
+
+def test_forced_refresh_is_not_counted_as_miss():
+    api = make_api({"tiles": TILES})
+
+    async def main():
+        await api.get_module_tile_snapshot("udid")
+        await api.get_module_tile_snapshot("udid")
+        await api.get_module_tile_snapshot("udid", max_age=0, max_staleness=0)
+
+    asyncio.run(main())
+    assert api.metrics.cache("tiles").as_dict() == {"hits": 1, "stale_hits": 0, "misses": 1, "refreshes": 1}
@@ -0,0 +1,223 @@
+"""Tests of the retry policy and the circuit breaker of the Tech API client."""
+import asyncio
+
+import aiohttp
+import pytest
+
+from tech_verano import resilience
+from tech_verano.resilience import CircuitBreaker, RetryPolicy
+from tech_verano.verano import TECH_VERANO, TechError
+
+
+class Clock:
+    """Replaces time.monotonic of the resilience module."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+
+def make_api(breaker):
+    return TECH_VERANO(
+        None, "1", "token",
+        retry_policy=RetryPolicy(attempts=3, base_delay=0, max_delay=0),
+        circuit_breaker=breaker
+    )
+
+
+def test_breaker_opens_at_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+
+def test_success_resets_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    open_breaker(breaker)
+
+    clock.now += 60
+    assert breaker.state == "half_open"
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_probe_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    open_breaker(breaker)
+    clock.now += 60
+    assert breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow_request()
+
+
+def test_probe_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    open_breaker(breaker)
+    clock.now += 60
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+
+def test_released_probe_lets_next_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    open_breaker(breaker)
+    clock.now += 60
+    assert breaker.allow_request()
+
+    breaker.release_probe()
+    assert breaker.allow_request()
+
+
+def test_retryable_errors():
+    assert RetryPolicy.is_retryable(aiohttp.ClientConnectionError())
+    assert RetryPolicy.is_retryable(asyncio.TimeoutError())
+    assert RetryPolicy.is_retryable(TechError(503, "Service Unavailable"))
+    assert not RetryPolicy.is_retryable(TechError(429, "Too Many Requests"))
+    assert not RetryPolicy.is_retryable(TechError(401, "Unauthorized"))
+    assert not RetryPolicy.is_retryable(ValueError("bad JSON"))
+
+
+def test_delay_is_capped():
+    policy = RetryPolicy(base_delay=1, max_delay=4)
+    for attempt in range(1, 10):
+        assert 0 <= policy.delay(attempt) <= min(4, 2 ** (attempt - 1))
+
+
+def test_with_retry_retries_until_success(clock):
+    api = make_api(CircuitBreaker())
+    calls = []
+
+    async def send():
+        calls.append(1)
+        if len(calls) < 3:
+            raise TechError(502, "Bad Gateway")
+        return "ok"
+
+    assert asyncio.run(api.with_retry(send)) == "ok"
+    assert len(calls) == 3
+    assert api.circuit_breaker.failures == 0
+
+
+def test_with_retry_gives_up_after_attempts(clock):
+    api = make_api(CircuitBreaker(failure_threshold=10))
+    calls = []
+
+    async def send():
+        calls.append(1)
+        raise TechError(503, "Service Unavailable")
+
+    with pytest.raises(TechError):
+        asyncio.run(api.with_retry(send))
+    assert len(calls) == 3
+    assert api.circuit_breaker.failures == 3
+
+
+def test_with_retry_does_not_retry_client_errors(clock):
+    api = make_api(CircuitBreaker())
+    calls = []
+
+    async def send():
+        calls.append(1)
+        raise TechError(404, "Not Found")
+
+    with pytest.raises(TechError):
+        asyncio.run(api.with_retry(send))
+    assert len(calls) == 1
+
+
+def test_with_retry_leaves_rate_limiting_to_the_scheduler(clock):
+    api = make_api(CircuitBreaker())
+    calls = []
+
+    async def send():
+        calls.append(1)
+        raise TechError(429, "Too Many Requests")
+
+    with pytest.raises(TechError) as error:
+        asyncio.run(api.with_retry(send))
+    assert error.value.status_code == 429
+    assert len(calls) == 1
+
+
+def test_with_retry_fails_fast_when_open(clock):
+    api = make_api(CircuitBreaker(failure_threshold=1, reset_timeout=60))
+    api.circuit_breaker.record_failure()
+
+    async def send():
+        raise AssertionError("request sent while the circuit is open")
+
+    with pytest.raises(TechError) as error:
+        asyncio.run(api.with_retry(send))
+    assert error.value.status_code == 503
+
+
+@pytest.mark.parametrize("error", [ValueError("bad JSON"), KeyError("tiles"), asyncio.CancelledError()])
+def test_probe_without_outcome_does_not_lock_the_circuit(clock, error):
+    api = make_api(CircuitBreaker(failure_threshold=1, reset_timeout=60))
+    api.circuit_breaker.record_failure()
+    clock.now += 60
+
+    async def failing_probe():
+        raise error
+
+    async def send():
+        return "ok"
+
+    with pytest.raises(type(error)):
+        asyncio.run(api.with_retry(failing_probe))
+    assert asyncio.run(api.with_retry(send)) == "ok"
+    assert api.circuit_breaker.state == "closed"
+
+
+def test_cancelled_probe_task_releases_the_circuit(clock):
+    api = make_api(CircuitBreaker(failure_threshold=1, reset_timeout=60))
+    api.circuit_breaker.record_failure()
+    clock.now += 60
+
+    async def main():
+        task = asyncio.ensure_future(api.with_retry(lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        async def send():
+            return "ok"
+
+        return await api.with_retry(send)
+
+    assert asyncio.run(main()) == "ok"
@@ -0,0 +1,61 @@
+"""Tests of the record and replay transports."""
+import asyncio
+import gzip
+import json
+
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from tech_verano.transport import RecordingTransport, ReplayTransport, TransportResponse
+
+AUTH_BODY = {"authenticated": True, "user_id": 1, "token": "secret-token"}
+SET_COOKIE = "session=secret-cookie; Max-Age=3600; path=/; HttpOnly"
+
+
+class StaticTransport:
+    cookie_jar = None
+
+    async def request(self, method, url, headers, data = None):
+        headers = CIMultiDictProxy(CIMultiDict([("Content-Type", "application/json"), ("Set-Cookie", SET_COOKIE)]))
+        return TransportResponse(200, headers, json.dumps(AUTH_BODY).encode())
+
+
+def record(path, data):
+    recorder = RecordingTransport(StaticTransport(), path)
+    response = asyncio.run(recorder.request("POST", "https://emodul.eu/api/v1/authentication", {}, data))
+    recorder.close()
+    return response
+
+
+def test_recording_redacts_secrets(tmp_path):
+    path = tmp_path / "session.jsonl.gz"
+    response = record(path, json.dumps({"username": "user", "password": "secret-password"}))
+
+    assert json.loads(response.body)["token"] == "secret-token"
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        recording = f.read()
+    for secret in ("secret-token", "secret-password", "secret-cookie"):
+        assert secret not in recording
+    assert "Max-Age=3600" in recording
+
+
+def test_replay_returns_recorded_responses(tmp_path):
+    path = tmp_path / "session.jsonl.gz"
+    record(path, None)
+
+    async def replay():
+        transport = ReplayTransport(path)
+        return await transport.request("POST", "https://other.host/api/v1/authentication", {})
+
+    response = asyncio.run(replay())
+    assert response.status == 200
+    assert json.loads(response.body)["authenticated"] is True
+
+
+def test_recording_accepts_bytes_bodies(tmp_path):
+    path = tmp_path / "session.jsonl.gz"
+    data = [{"ido": 1, "params": 215, "module_index": 0}]
+    record(path, json.dumps(data).encode())
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        line = json.loads(f.readline())
+    assert json.loads(line["d"]) == data
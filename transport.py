@@ -0,0 +1,169 @@
+"""Pluggable HTTP transports of the Tech API client.
+
+AiohttpTransport sends requests through an aiohttp session, RecordingTransport
+records the requests of another transport to a file and ReplayTransport
+answers requests from such a file, offline and deterministically.
+"""
+import asyncio
+import collections
+import gzip
+import json
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+
+# Request and response body fields never written to recordings.
+REDACTED_FIELDS = frozenset(("password", "token"))
+REDACTED = "**REDACTED**"
+
+
+class TransportResponse:
+    """Response of a transport, with the body already read."""
+
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+    def text(self):
+        return self.body.decode("utf-8", errors="replace")
+
+
+class AiohttpTransport:
+    """Sends requests through an aiohttp session."""
+
+    def __init__(self, session: aiohttp.ClientSession, timeout = None):
+        self.session = session
+        self.timeout = timeout
+
+    @property
+    def cookie_jar(self):
+        return self.session.cookie_jar
+
+    async def request(self, method, url, headers, data = None):
+        """Sends a request and reads the response body.
+
+        Returns:
+        TransportResponse object.
+        """
+        async with self.session.request(method, url, headers=headers, data=data, timeout=self.timeout) as response:
+            return TransportResponse(response.status, response.headers, await response.read())
+
+
+def _request_key(method, url):
+    """Returns the replay key of a request: method, path and query."""
+    parts = urlsplit(url)
+    return f"{method} {parts.path}{'?' + parts.query if parts.query else ''}"
+
+
+def _redact_fields(value):
+    if isinstance(value, dict):
+        return {k: REDACTED if k in REDACTED_FIELDS else _redact_fields(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact_fields(v) for v in value]
+    return value
+
+
+def _redact(data):
+    """Returns a JSON body, as a string, with the [REDACTED_FIELDS] replaced."""
+    if not data:
+        return data
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8", errors="replace")
+    try:
+        body = json.loads(data)
+    except ValueError:
+        return data
+    redacted = _redact_fields(body)
+    if redacted != body:
+        return json.dumps(redacted)
+    return data
+
+
+def _redact_headers(headers):
+    """Returns response headers with the cookie values replaced."""
+    items = []
+    for key, value in headers.items():
+        if key.lower() == "set-cookie":
+            name, _, rest = value.partition("=")
+            _, sep, attributes = rest.partition(";")
+            value = f"{name}={REDACTED}{sep}{attributes}"
+        items.append((key, value))
+    return items
+
+
+class RecordingTransport:
+    """Records requests of another transport to a gzip compressed JSON lines file.
+
+    Every line holds the request key, the offset from the start of the
+    recording and the latency in seconds, the request body, the response
+    status, headers and body. Passwords, tokens and cookie values are
+    redacted.
+    """
+
+    def __init__(self, inner, path):
+        self.inner = inner
+        self.path = path
+        self._start = time.monotonic()
+        self._file = gzip.open(path, "at", encoding="utf-8")
+
+    @property
+    def cookie_jar(self):
+        return self.inner.cookie_jar
+
+    async def request(self, method, url, headers, data = None):
+        start = time.monotonic()
+        response = await self.inner.request(method, url, headers, data)
+        self._file.write(json.dumps({
+            "k": _request_key(method, url),
+            "t": round(start - self._start, 3),
+            "l": round(time.monotonic() - start, 3),
+            "d": _redact(data),
+            "s": response.status,
+            "h": _redact_headers(response.headers),
+            "b": _redact(response.body.decode("utf-8", errors="replace")),
+        }, separators=(",", ":")) + "\n")
+        return response
+
+    def close(self):
+        self._file.close()
+
+
+class ReplayMissError(Exception):
+    """Raised when a replayed request has no recorded response."""
+
+
+class ReplayTransport:
+    """Answers requests with responses recorded by RecordingTransport.
+
+    Responses to the same request are replayed in the recorded order, the last
+    one is repeated once they run out. Recorded latencies are divided by
+    [speed], 0 replays without any delay.
+    """
+
+    def __init__(self, path, speed = 0):
+        self.speed = speed
+        self.cookie_jar = aiohttp.DummyCookieJar()
+        self.responses = collections.defaultdict(collections.deque)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                self.responses[record["k"]].append(record)
+
+    async def request(self, method, url, headers, data = None):
+        key = _request_key(method, url)
+        if not (records := self.responses.get(key)):
+            raise ReplayMissError(key)
+        record = records.popleft() if len(records) > 1 else records[0]
+        if self.speed:
+            await asyncio.sleep(record["l"] / self.speed)
+        return TransportResponse(
+            record["s"], CIMultiDictProxy(CIMultiDict(record["h"])), record["b"].encode("utf-8")
+        )
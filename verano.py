@@ -3,20 +3,63 @@ import aiohttp
 import json
 import time
 import asyncio
+from http.cookies import SimpleCookie
 
-logging.basicConfig(level=logging.DEBUG)
+from .codec import DEFAULT_CODEC
+from .decoder import TILE_DECODERS, TileDecoder, TileSnapshot, decode_zones, shared_string_table
+from .metrics import TechMetrics
+from .resilience import CircuitBreaker, RetryPolicy
+from .transport import AiohttpTransport, TransportResponse
 
 # ----------- GLOBAL ----------- #
 _LOGGER = logging.getLogger(__name__)
 # ----------- GLOBAL ----------- #
 
+# Per-request deadlines in seconds, a stalled request is cancelled after them.
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10, sock_read=20)
+
+# Connection pool of the Tech API session.
+CONNECTION_LIMIT_PER_HOST = 4
+# Module payloads fetched at the same time, fits in the connection pool.
+MAX_CONCURRENT_FETCHES = CONNECTION_LIMIT_PER_HOST
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 60
+
+
+def create_session(ssl_context = None):
+    """Creates an HTTP session tuned for the Tech API.
+
+    Connections to emodul.eu are kept alive and limited per host, resolved
+    addresses are cached and requests have the [REQUEST_TIMEOUT] deadlines.
+    The session has its own cookie jar and has to be closed by the caller.
+
+    Parameters:
+    ssl_context (ssl.SSLContext): SSL context, aiohttp default if not set.
+
+    Returns:
+    aiohttp.ClientSession object.
+    """
+    connector = aiohttp.TCPConnector(
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        enable_cleanup_closed=True,
+        ssl=ssl_context if ssl_context is not None else True
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=REQUEST_TIMEOUT)
+
+
 class TECH_VERANO:
     """Main class to perform Tech API requests"""
 
     TECH_API_URL = "https://emodul.eu/"
 
     def __init__(self, session: aiohttp.ClientSession, user_id = None, token = None, 
-                 base_url = TECH_API_URL, update_interval = 30):
+                 base_url = TECH_API_URL, update_interval = 30, command_delay = 0.5,
+                 optimistic_ttl = 90, retry_policy = None, circuit_breaker = None,
+                 username = None, password = None, on_token_refresh = None,
+                 max_staleness = 300, request_timeout = REQUEST_TIMEOUT, transport = None,
+                 max_concurrent_fetches = MAX_CONCURRENT_FETCHES, codec = None):
        
         _LOGGER.debug("Init TECH_VERANO class object.")
 
@@ -28,6 +71,8 @@ class TECH_VERANO:
         self.base_url = base_url
         self.update_interval = update_interval
         self.session = session
+        self.transport = transport or AiohttpTransport(session, request_timeout)
+        self.codec = codec or DEFAULT_CODEC
 
         if user_id and token:
             self.user_id = user_id
@@ -35,96 +80,281 @@ class TECH_VERANO:
             self.headers.setdefault("Authorization", "Bearer " + token)
             self.authenticated = True
         else:
+            self.user_id = user_id
+            self.token = token
             self.authenticated = False
 
-        self.last_update = None
-        self.update_lock = asyncio.Lock()
-        self.zones = {}
-        self.tiles = {}
+        # Credentials for transparent re-authentication when the token expires.
+        self.username = username
+        self.password = password
+        self.on_token_refresh = on_token_refresh
+        self._auth_task = None
+
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.metrics = TechMetrics()
+        self.inflight = {}
+        self.cookie_headers = {}
+        self.cache = {}
+        self.module_locks = {}
+        self.max_staleness = max_staleness
+        self.revalidations = {}
+        self.fetch_slots = asyncio.Semaphore(max_concurrent_fetches)
+        self.refresh_round = 0
+        self.command_delay = command_delay
+        self.command_queues = {}
+        self.optimistic_ttl = optimistic_ttl
+        self.pending = {}
         self.selectedModuleIndex = None
         self.selectedModuleHash = None
         self.language_strings_dict = None
+        self._tile_decoder = None
 
 
-    async def tech_get(self, request_path: str, headers: dict):
+    async def tech_get(self, request_path: str, headers: dict, with_headers: bool = False, decode = None):
         """ A wrapper for GET request
+
+        With [with_headers] set, a (data, response headers) tuple is returned
+        and a 304 Not Modified response is accepted with data set to None.
+        [decode] replaces the JSON decoding of the body, it has to be an
+        async method so that identical requests can be recognized.
+
+        Concurrent identical requests share one response, callers must not
+        modify the returned data.
+        """
+
+        # Headers carry the auth identity and the conditional request validators.
+        key = (request_path, with_headers, decode, tuple(sorted(headers.items())))
+        if (request := self.inflight.get(key)) is None:
+            request = asyncio.ensure_future(self.with_auth(
+                lambda h: self.with_retry(lambda: self._tech_get_once(request_path, h, with_headers, decode)), headers
+            ))
+            self.inflight[key] = request
+            request.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            _LOGGER.debug("Joining in-flight GET request to Tech API: %s", request_path)
+
+        # A cancelled caller must not cancel the request for the others.
+        return await asyncio.shield(request)
+
+
+    async def _tech_get_once(self, request_path: str, headers: dict, with_headers: bool, decode = None):
+        """ Single GET request attempt
         """
 
         url = self.base_url + request_path
 
-        _LOGGER.debug("Sending GET request to Tech API: " + url)
+        _LOGGER.debug("Sending GET request to Tech API: %s", url)
 
-        async with self.session.get(url, headers=headers) as response:
+        start = time.perf_counter()
+        size = 0
+        error = True
+        try:
+            response = await self.transport.request("GET", url, headers)
+            _LOGGER.debug("Tech API GET request headers: %s", headers)
+            _LOGGER.debug("Tech API GET response headers: %s", response.headers)
 
-            if response.status != 200:
+            if response.status != 200 and not (with_headers and response.status == 304):
                 _LOGGER.warning("Invalid response from Tech API: %s", response.status)
-                raise TechError(response.status, await response.text())
+                raise TechError(response.status, response.text())
 
-            data = await response.json()
-            await self.update_cookies(response=response)
-
-            _LOGGER.debug("Tech API GET request headers: %s", str(response.request_info.headers))
-            _LOGGER.debug("Tech API GET response headers: %s", str(response.headers))
+            size = len(response.body)
+            data = await (decode or self.codec.decode)(response.body) if response.status == 200 else None
+            self.update_cookies(response=response)
+            error = False
 
+            if with_headers:
+                return data, response.headers
             return data
+        finally:
+            self.metrics.record_request("GET", request_path, time.perf_counter() - start, size, error)
         
     
-    async def tech_post(self, request_path: str, post_data: str, headers: dict):
+    async def tech_post(self, request_path: str, post_data: str | bytes, headers: dict):
         """ A wrapper for POST request
         """
+
+        return await self.with_auth(
+            lambda h: self.with_retry(lambda: self._tech_post_once(request_path, post_data, h)), headers
+        )
+
+
+    async def _tech_post_once(self, request_path: str, post_data: str | bytes, headers: dict):
+        """ Single POST request attempt
+        """
         
         url = self.base_url + request_path
 
-        _LOGGER.debug("Sending POST request to Tech API: " + url)
+        _LOGGER.debug("Sending POST request to Tech API: %s", url)
 
-        async with self.session.post(url, data=post_data, headers=headers) as response:
-            _LOGGER.debug("Tech API POST request data: %s", str(post_data))
-            _LOGGER.debug("Tech API POST request headers: %s", str(response.request_info.headers))
-            _LOGGER.debug("Tech API POST response headers: %s", str(response.headers))
+        start = time.perf_counter()
+        size = 0
+        error = True
+        try:
+            response = await self.transport.request("POST", url, headers, post_data)
+            _LOGGER.debug("Tech API POST request data: %s", post_data)
+            _LOGGER.debug("Tech API POST request headers: %s", headers)
+            _LOGGER.debug("Tech API POST response headers: %s", response.headers)
             if response.status != 200:
                 _LOGGER.warning("Invalid response from Tech API: %s", response.status)
-                raise TechError(response.status, await response.text())
+                raise TechError(response.status, response.text())
 
-            data = await response.json()
-            await self.update_cookies(response=response)
+            size = len(response.body)
+            data = await self.codec.decode(response.body)
+            self.update_cookies(response=response)
+            error = False
             
             _LOGGER.debug("Tech API POST response: %s", data)
             
             return data
+        finally:
+            self.metrics.record_request("POST", request_path, time.perf_counter() - start, size, error)
         
             
-    async def update_cookies(self, response: aiohttp.ClientResponse):
-        
-        from http.cookies import SimpleCookie, Morsel
+    async def with_auth(self, send, headers: dict):
+        """Sends an authorized request, refreshing an expired token once.
 
-        cookie_set = SimpleCookie()
-        _LOGGER.debug("Updating cookies for Tech API ...")
+        Parameters:
+        send (callable): Coroutine function sending the request with the given headers.
+        headers (dict): Request headers.
+
+        Returns:
+        The result of [send].
+        """
 
+        token = self.token
         try:
-            for k in response.raw_headers:
-                if "Set-Cookie" in k[0].decode():
-                    cookie_elements = [x.strip() for x in k[1].decode("utf-8").split(';')]
+            return await send(headers)
+        except TechError as e:
+            if e.status_code != 401 or "Authorization" not in headers or not self.username:
+                raise
+            _LOGGER.debug("Tech API token rejected, refreshing it.")
+            if not await self.refresh_token(token):
+                raise
+
+        return await send({**headers, "Authorization": "Bearer " + self.token})
+
+
+    async def refresh_token(self, stale_token = None):
+        """Re-authenticates with the stored credentials.
+
+        Concurrent callers share one in-flight authentication.
+
+        Parameters:
+        stale_token (string): The rejected token, no authentication is done
+        when the token was already replaced.
+
+        Returns:
+        True if authenticated.
+        """
+
+        if stale_token is not None and self.token != stale_token and self.authenticated:
+            return True
 
-                    # Get name of cookie from first row
-                    c_row = [x.strip() for x in cookie_elements[0].split('=')]
+        if self._auth_task is None:
+            self._auth_task = asyncio.ensure_future(self._reauthenticate())
+            self._auth_task.add_done_callback(self._auth_done)
+        return await asyncio.shield(self._auth_task)
 
-                    cookie_set[c_row[0]] = c_row[1]
 
-                    for i in cookie_elements:
-                        if '=' in i:
-                            c = [x.strip() for x in i.split('=')]
-                            if len(c) == 2 and c[0] != c_row[0]:
-                                cookie_set[c_row[0]][c[0]] = c[1]
-                    cookie_set[c_row[0]]['HttpOnly'] = True
-                    cookie_set[c_row[0]]['secure'] = True
-                    cookie_set[c_row[0]]['domain'] = 'emodul.eu'
+    def _auth_done(self, task):
+        self._auth_task = None
+
+
+    async def _reauthenticate(self):
+        authenticated = await self.authenticate(self.username, self.password)
+        if authenticated and self.on_token_refresh is not None:
+            self.on_token_refresh(self.user_id, self.token)
+        return authenticated
+
+
+    async def with_retry(self, send):
+        """Sends a request according to the retry policy and the circuit breaker.
+
+        Parameters:
+        send (callable): Coroutine function sending a single request attempt.
+
+        Returns:
+        The result of [send].
+        """
+
+        attempt = 0
+        while True:
+            if not self.circuit_breaker.allow_request():
+                raise TechError(503, "Tech API circuit open, failing fast")
+
+            attempt += 1
+            try:
+                result = await send()
+            except Exception as e:
+                if not self.retry_policy.is_retryable(e):
+                    if isinstance(e, TechError):
+                        # The API answered, so it is up.
+                        self.circuit_breaker.record_success()
+                    else:
+                        # An unreadable response says nothing about the API.
+                        self.circuit_breaker.release_probe()
+                    raise
+                self.circuit_breaker.record_failure()
+                if attempt >= self.retry_policy.attempts:
+                    raise
+                delay = self.retry_policy.delay(attempt)
+                _LOGGER.warning("Tech API request failed (%s), retrying in %.1f s", e, delay)
+                await asyncio.sleep(delay)
+            except BaseException:
+                # A cancelled probe must not keep the circuit half open.
+                self.circuit_breaker.release_probe()
+                raise
+            else:
+                self.circuit_breaker.record_success()
+                return result
+            
+            
+    def update_cookies(self, response: TransportResponse):
+        """Stores cookies set by a Tech API response in the session cookie jar.
+
+        Cookies are stored as secure, HTTP only cookies of emodul.eu. Responses
+        without Set-Cookie headers are skipped, and so are cookies whose
+        Set-Cookie header did not change since the last response, unless it
+        has a Max-Age: re-sending it extends the cookie lifetime. The same
+        absolute expires date changes nothing.
+        """
+
+        set_cookies = response.headers.getall("Set-Cookie", None)
+        if not set_cookies:
+            return
 
-                    if len(cookie_set) > 0:
-                        self.session.cookie_jar.update_cookies(cookie_set)
-                        _LOGGER.debug("Cookies for Tech API were updated!")
+        cookie_set = None
+        changed = {}
+        try:
+            for header in set_cookies:
+                elements = header.split(";")
+                name, _, value = elements[0].partition("=")
+                name = name.strip()
+                if self.cookie_headers.get(name) == header and not _has_max_age(header):
+                    continue
+
+                if cookie_set is None:
+                    cookie_set = SimpleCookie()
+                cookie_set[name] = value.strip()
+                morsel = cookie_set[name]
+                for element in elements[1:]:
+                    key, sep, value = element.partition("=")
+                    key = key.strip()
+                    if sep and morsel.isReservedKey(key):
+                        morsel[key] = value.strip()
+                morsel["httponly"] = True
+                morsel["secure"] = True
+                morsel["domain"] = "emodul.eu"
+                changed[name] = header
+
+            if cookie_set is not None:
+                self.transport.cookie_jar.update_cookies(cookie_set)
+                self.cookie_headers.update(changed)
+                _LOGGER.debug("Cookies for Tech API were updated: %s", list(cookie_set))
 
         except Exception as e:
-            _LOGGER.error(f"Parsing 'Set-cookies' cookie for Tech API failed, Error: {e}")
+            _LOGGER.error("Parsing 'Set-cookies' cookie for Tech API failed, Error: %s", e)
         
 
     async def authenticate(self, username: str, password: str):
@@ -139,16 +369,18 @@ class TECH_VERANO:
             "languageId": "en",
             "remote": False
         }
-        headers = self.headers
-        headers.update({
+        # Login requests never carry the (possibly expired) bearer token.
+        headers = {
+            'Accept': 'application/json, text/plain, */*',
+            'Accept-Encoding': 'gzip, deflate, br, zstd',
             "Referer": "https://emodul.eu/login",
             "Origin": "https://emodul.eu"
-        })
+        }
 
         _LOGGER.info("TECH_VERANO authentication.")
 
         try:
-            _LOGGER.info(f"TECH_VERANO auth at login page: {path}")
+            _LOGGER.info("TECH_VERANO auth at login page: %s", path)
             result = await self.tech_post(request_path=path, post_data=json.dumps(post_data), headers=headers)
             self.authenticated = result["authenticated"]
             if self.authenticated:
@@ -157,7 +389,7 @@ class TECH_VERANO:
             
             
             path = "api/v1/authentication"
-            _LOGGER.info(f"TECH_VERANO auth at login page: {path}")
+            _LOGGER.info("TECH_VERANO auth at login page: %s", path)
             result = await self.tech_post(request_path=path, post_data=json.dumps(post_data), headers=headers)
             
             self.authenticated = result["authenticated"]
@@ -165,6 +397,7 @@ class TECH_VERANO:
             if self.authenticated:
                 self.user_id = str(result["user_id"])
                 self.token = result["token"]
+                # Replace the headers at once, requests in flight keep their copy.
                 self.headers = {
                     'Accept': 'application/json',
                     'Accept-Encoding': 'gzip',
@@ -173,6 +406,7 @@ class TECH_VERANO:
 
         except Exception as e:
             _LOGGER.error("TECH_VERANO authentication failed, error: %s", e)
+            return False
 
         return result["authenticated"]
     
@@ -182,37 +416,54 @@ class TECH_VERANO:
         """
 
         if self.authenticated:
-            _LOGGER.debug(f"Checking if the user {self.user_id} is authenticated ...")
+            _LOGGER.debug("Checking if the user %s is authenticated ...", self.user_id)
             
             path = "frontend/is_authenticated"
             result = await self.tech_get(request_path=path, headers=self.headers)
 
         else:
-            _LOGGER.error(f"The user {self.user_id} is not authenticated.")
+            _LOGGER.error("The user %s is not authenticated.", self.user_id)
             raise TechError(401, "Unauthorized")
         
         return result
 
 
-    async def language_strings(self):
+    async def language_strings(self, etag = None, last_modified = None):
         """ Pull list of language strings
+
+        Parameters:
+        etag (string): ETag of the cached dictionary, sent as If-None-Match.
+        last_modified (string): Last-Modified of the cached dictionary, sent as If-Modified-Since.
+
+        Returns:
+        Dictionary with "data", "etag" and "last_modified" keys, "data" is None
+        when the cached dictionary was not modified.
         """
 
         try:
-            _LOGGER.debug(f"Pulling language strings ...")
+            _LOGGER.debug("Pulling language strings ...")
             
             path = "api/v1/i18n/en"
             headers = {
                 'Accept': 'application/json',
                 'Accept-Encoding': 'gzip'
             }
-            result = await self.tech_get(request_path=path, headers=headers)
-            if result:
-                self.language_strings_dict = result["data"]
-                return(result["data"])
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+            result, response_headers = await self.tech_get(request_path=path, headers=headers, with_headers=True)
+            strings = {
+                "data": result["data"] if result else None,
+                "etag": response_headers.get("ETag", etag),
+                "last_modified": response_headers.get("Last-Modified", last_modified)
+            }
+            if strings["data"] is not None:
+                self.language_strings_dict = strings["data"]
+            return strings
 
         except Exception as e:
-            _LOGGER.error(f"Pulling language strings failed. Error: {e}")
+            _LOGGER.error("Pulling language strings failed. Error: %s", e)
         
         return None
     
@@ -222,151 +473,350 @@ class TECH_VERANO:
         """
 
         if self.authenticated:
-            _LOGGER.debug(f"The user {self.user_id} authenticated, getting list of modules ...")
+            _LOGGER.debug("The user %s authenticated, getting list of modules ...", self.user_id)
             
             path = "api/v1/users/" + self.user_id + "/modules"
             result = await self.tech_get(request_path=path, headers=self.headers)
 
         else:
-            _LOGGER.error(f"Pulling list of modules failed. The user {self.user_id} is not authenticated")
+            _LOGGER.error("Pulling list of modules failed. The user %s is not authenticated", self.user_id)
             raise TechError(401, "Unauthorized")
         
         return result
     
     
-    async def get_module_data(self, module_udid):
+    async def get_module_data(self, module_udid, selective = False):
         """ Get module data.
+
+        With [selective] set, only the tiles of a known type and the zone
+        elements are decoded, see decode_module_data.
         """
 
-        _LOGGER.debug(f"Getting module {module_udid} data ...")
+        _LOGGER.debug("Getting module %s data ...", module_udid)
 
         if self.authenticated:
             path = "api/v1/users/" + self.user_id + "/modules/" + module_udid
-            result = await self.tech_get(request_path=path, headers=self.headers)
+            result = await self.tech_get(
+                request_path=path, headers=self.headers,
+                decode=self.decode_module_data if selective else None
+            )
 
         else:
-            _LOGGER.error(f"Pulling module data failed. The user {self.user_id} is not authenticated")
+            _LOGGER.error("Pulling module data failed. The user %s is not authenticated", self.user_id)
             raise TechError(401, "Unauthorized")
         
         return result
     
     
+    async def decode_module_data(self, body):
+        """Decodes the parts of a module payload read by refresh_module.
+
+        Parameters:
+        body (bytes): The module payload.
+
+        Returns:
+        Dictionary with the tiles of the types known to the tile decoder and
+        the "zones" {"elements"} list.
+        """
+        return await self.codec.decode_module(body, TILE_DECODERS)
+
+
     async def get_module_data_web(self, module_index):
         """ Get module data.
         """
 
-        _LOGGER.debug(f"Getting module {module_index} data ...")
+        _LOGGER.debug("Getting module %s data ...", module_index)
 
         if self.authenticated:
             path = "frontend/menu_main?module_index=0"
             result = await self.tech_get(request_path=path, headers=self.headers)
 
         else:
-            _LOGGER.error(f"Pulling module data failed. The user {self.user_id} is not authenticated")
+            _LOGGER.error("Pulling module data failed. The user %s is not authenticated", self.user_id)
             raise TechError(401, "Unauthorized")
         
         return result
     
     
-    async def get_module_zones(self, module_udid):
-        """Returns Tech module zones either from cache or it will
-        update all the cached values for Tech module assuming
-        no update has occurred for at least the [update_interval].
+    def cache_entry(self, module_udid, view):
+        """Returns the cache entry of the given module view, creating it if needed.
+
+        All views of a module share one lock, as they are filled from the
+        same module payload.
+
+        Parameters:
+        module_udid (string): The Tech module udid.
+        view (string): The cached view of the module, "zones" or "tiles".
+
+        Returns:
+        CacheEntry object.
+        """
+        key = (module_udid, view)
+        entry = self.cache.get(key)
+        if entry is None:
+            lock = self.module_locks.setdefault(module_udid, asyncio.Lock())
+            entry = self.cache[key] = CacheEntry(self.update_interval, lock)
+        return entry
+
+
+    async def refresh_module(self, module_udid):
+        """Fetches the module payload once and updates both its zones and its tiles
+        in cache. The caller holds the module lock.
+
+        Fetches of different modules run concurrently, at most
+        [max_concurrent_fetches] at a time and in the order they were started.
+
+        Parameters:
+        module_udid (string): The Tech module udid.
+        """
+        _LOGGER.debug("Updating module %s zones and tiles cache ...", module_udid)
+        async with self.fetch_slots:
+            result = await self.get_module_data(module_udid, selective=True)
+        if self.language_strings_dict is None:
+            await self.language_strings()
+
+        zones_entry = self.cache_entry(module_udid, "zones")
+        # Payloads of modules without zones may have no or a null "zones" element.
+        zones_entry.set(decode_zones((result.get("zones") or {}).get("elements") or []))
+
+        tiles_entry = self.cache_entry(module_udid, "tiles")
+        snapshot = self.tile_decoder().decode(result.get("tiles"))
+        self.reconcile_pending(module_udid, snapshot)
+        _LOGGER.debug("Module %s tiles data: %s", module_udid, snapshot.tiles)    
+        tiles_entry.set(snapshot)
+
+
+    async def get_cached(self, module_udid, view, max_age = None, max_staleness = None):
+        """Returns a module view from cache, stale-while-revalidate.
+
+        A fresh value is returned as is. A stale value younger than
+        [max_staleness] is returned right away while a background task
+        refreshes it. Older values, or no value at all, are refreshed before
+        returning.
+
+        Parameters:
+        module_udid (string): The Tech module udid.
+        view (string): The cached view of the module, "zones" or "tiles".
+        max_age (float): Maximum age of a fresh value, defaults to [update_interval].
+        max_staleness (float): Maximum age of a value returned without waiting,
+        defaults to [max_staleness] of the instance.
+
+        Returns:
+        Tuple of the value and its age in seconds.
+        """
+        entry = self.cache_entry(module_udid, view)
+        if max_staleness is None:
+            max_staleness = self.max_staleness
+        _LOGGER.debug("Geting module %s %s: last_update %s, ttl: %s", module_udid, view, entry.updated, entry.ttl)
+
+        stats = self.metrics.cache(view)
+        if entry.is_fresh(max_age):
+            stats.hits += 1
+        elif entry.is_fresh(max_staleness):
+            stats.stale_hits += 1
+            self.revalidate(module_udid, max_age)
+        else:
+            if max_age == 0:
+                stats.refreshes += 1
+            else:
+                stats.misses += 1
+            async with entry.lock:
+                if not entry.is_fresh(max_age):
+                    await self.refresh_module(module_udid)
+        return entry.value, entry.age
+
+
+    def revalidate(self, module_udid, max_age = None):
+        """Refreshes the module cache in a background task, unless one is running.
+
+        Parameters:
+        module_udid (string): The Tech module udid.
+        max_age (float): Maximum age of the cached values, defaults to [update_interval].
+        """
+        if module_udid in self.revalidations:
+            return
+
+        async def revalidate():
+            entry = self.cache_entry(module_udid, "tiles")
+            try:
+                async with entry.lock:
+                    if not entry.is_fresh(max_age):
+                        await self.refresh_module(module_udid)
+            except Exception as e:
+                _LOGGER.warning("Background refresh of module %s failed. Error: %s", module_udid, e)
+            finally:
+                del self.revalidations[module_udid]
+
+        self.revalidations[module_udid] = asyncio.ensure_future(revalidate())
+
+
+    async def get_module_zones(self, module_udid, max_age = None, max_staleness = None):
+        """Returns Tech module zones, see get_cached.
 
         Parameters:
-        inst (Tech): The instance of the Tech API.
         module_udid (string): The Tech module udid.
+        max_age (float): Maximum age of fresh zones, defaults to [update_interval].
+        max_staleness (float): Maximum age of zones returned without waiting.
 
         Returns:
-        Dictionary of zones indexed by zone ID.
-        """
-        async with self.update_lock:
-            now = time.time()
-            _LOGGER.debug("Geting module zones: now: %s, last_update %s, interval: %s", now, self.last_update, self.update_interval)
-            if self.last_update is None or now > self.last_update + self.update_interval:
-                _LOGGER.debug("Updating module zones cache..." + module_udid)    
-                result = await self.get_module_data(module_udid)
-                zones = result["zones"]["elements"]
-                zones = list(filter(lambda e: e['zone']['zoneState'] != "zoneUnregistered", zones))
-                for zone in zones:
-                    self.zones[zone["zone"]["id"]] = zone
-                self.last_update = now
-        return self.zones
+        Dictionary of registered zones indexed by zone ID.
+        """
+        zones, _ = await self.get_cached(module_udid, "zones", max_age, max_staleness)
+        return zones
     
 
+    async def get_module_tile_snapshot(self, module_udid, max_age = None, max_staleness = None):
+        """Returns Tech module tiles snapshot, see get_cached.
+
+        Parameters:
+        module_udid (string): The Tech module udid.
+        max_age (float): Maximum age of fresh tiles, defaults to [update_interval].
+        max_staleness (float): Maximum age of tiles returned without waiting.
+
+        Returns:
+        TileSnapshot object with tile records and the txtId index.
+        """
+        snapshot, _ = await self.get_cached(module_udid, "tiles", max_age, max_staleness)
+        return snapshot
+
+
+    async def get_module_tile_snapshots(self, module_udids, max_age = None, max_staleness = None):
+        """Returns tiles snapshots of several Tech modules, fetched concurrently.
+
+        The modules are started in a rotating order, so with more modules than
+        fetch slots the same module is not always the last one to be fetched.
+        Every fetch runs to completion even if another one fails, a failing
+        module does not affect the results of the others.
+
+        Parameters:
+        module_udids (list): The Tech module udids.
+        max_age (float): Maximum age of fresh tiles, defaults to [update_interval].
+        max_staleness (float): Maximum age of tiles returned without waiting.
+
+        Returns:
+        Tuple of the dictionary of TileSnapshot objects and the dictionary of
+        errors of the failed modules, both indexed by module udid.
+        """
+        module_udids = list(module_udids)
+        if module_udids:
+            shift = self.refresh_round % len(module_udids)
+            module_udids = module_udids[shift:] + module_udids[:shift]
+            self.refresh_round += 1
+
+        results = await asyncio.gather(
+            *(self.get_module_tile_snapshot(udid, max_age, max_staleness) for udid in module_udids),
+            return_exceptions=True
+        )
+        snapshots = {}
+        errors = {}
+        for udid, result in zip(module_udids, results):
+            if isinstance(result, Exception):
+                errors[udid] = result
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                snapshots[udid] = result
+        return snapshots, errors
+
+
     async def get_module_tiles(self, module_udid):
-        """Returns Tech module tiles either from cache or it will
-        update all the cached values for Tech module assuming
-        no update has occurred for at least the [update_interval].
+        """Returns Tech module tiles, see get_module_tile_snapshot.
 
         Parameters:
-        inst (Tech): The instance of the Tech API.
         module_udid (string): The Tech module udid.
 
         Returns:
-        Dictionary of tiles indexed by tiles ID.
-        """
-
-        async with self.update_lock:
-            now = time.time()
-            _LOGGER.debug("Geting module tiles: now: %s, last_update %s, interval: %s", now, self.last_update, self.update_interval)
-
-            if self.last_update is None or now > self.last_update + self.update_interval:
-
-                _LOGGER.debug(f"Updating module {module_udid} tiles cache ...")
-                await self.language_strings()
-                result = await self.get_module_data(module_udid)
-                if self.language_strings_dict is None:
-                    await self.language_strings()
-                tiles = result["tiles"]
-
-                temp_tiles = {}
-                if tiles:
-                    for tile in tiles:
- 
-                        # type = 6, Universal status with widgets
-                        # type = 40, Text information
-                        # type = 50, Controller software version
-                        if tile["type"] == 6:
-                            if (tile_params := tile["params"]) is not None:                            
-                                data = []
-                                for k,v in tile_params.items():
-                                    if ("widget" in k) and v.get("txtId") != 0:
-                                        t = [self.language_strings_dict.get(str(v.get("txtId")))]
-                                        # Units:
-                                        # - value type = 6: Degrees Celsius.
-                                        # - value type = 7: Tenth degrees Celsius.
-                                        # - value type = 18: Inscription from CN Description Base, or flame brightness in status history [0-8000]
-                                        # - value type = 8: Percentages.
-                                        if v.get("unit") == 7:
-                                            t.append(v.get("value")/10)
-                                        elif v.get("unit") == 18:
-                                            t.append(self.language_strings_dict.get(str(v.get("value"))))
-                                        else:
-                                            t.append(v.get("value"))
-                                        data.append(t)
-
-                                temp_tiles[tile["id"]] = data
-
-                        elif tile["type"] == 40:
-                            if (tile_params := tile["params"]) is not None:   
-                                temp_tiles[tile["id"]] = [
-                                    self.language_strings_dict.get(str(tile_params.get("headerId"))),
-                                    self.language_strings_dict.get(str(tile_params.get("statusId")))
-                                ]
-                        elif tile["type"] == 50:
-                            if (tile_params := tile["params"]) is not None:   
-                                temp_tiles[tile["id"]] = [
-                                    self.language_strings_dict.get(str(tile_params.get("txtId"))),
-                                    tile_params.get("controllerName"),
-                                    tile_params.get("version")
-                                ]
-
-                _LOGGER.debug(f"Module {module_udid} tiles data: {temp_tiles}")    
-                self.last_update = now
-                self.tiles = temp_tiles
-
-        return self.tiles
+        Dictionary of tile records indexed by tiles ID.
+        """
+        snapshot = await self.get_module_tile_snapshot(module_udid)
+        return snapshot.tiles
+
+
+    async def get_module_tile_index(self, module_udid):
+        """Returns Tech module tile values, see get_module_tile_snapshot.
+
+        Parameters:
+        module_udid (string): The Tech module udid.
+
+        Returns:
+        Dictionary of typed tile values indexed by (tile ID, txtId).
+        """
+        snapshot = await self.get_module_tile_snapshot(module_udid)
+        return snapshot.index
+
+
+    def apply_optimistic(self, module_udid, values):
+        """Writes values set by a command through to the cached tiles.
+
+        The values are marked as pending and kept over fetched values until the
+        server confirms them or [optimistic_ttl] seconds pass.
+
+        Parameters:
+        module_udid (string): The Tech module udid.
+        values (dict): Typed values indexed by (tile ID, txtId).
+
+        Returns:
+        Patched TileSnapshot object, None if no tiles are cached yet.
+        """
+        pending = self.pending.setdefault(module_udid, {})
+        expires = time.monotonic() + self.optimistic_ttl
+        for key, value in values.items():
+            pending[key] = (value, expires)
+
+        entry = self.cache_entry(module_udid, "tiles")
+        if entry.value is not None:
+            entry.value = TileSnapshot(entry.value.tiles, {**entry.value.index, **values}, frozenset(pending))
+        return entry.value
+
+
+    def reconcile_pending(self, module_udid, snapshot):
+        """Reconciles pending optimistic values with a fetched snapshot.
+
+        Confirmed and expired values are dropped, the others are applied to
+        the snapshot.
+
+        Parameters:
+        module_udid (string): The Tech module udid.
+        snapshot (TileSnapshot): The fetched tiles.
+        """
+        if not (pending := self.pending.get(module_udid)):
+            return
+
+        now = time.monotonic()
+        for key, (value, expires) in list(pending.items()):
+            if snapshot.index.get(key) == value or now > expires:
+                del pending[key]
+            else:
+                snapshot.index[key] = value
+        snapshot.pending = frozenset(pending)
+
+
+    def string_table(self):
+        """Returns the process-wide string table of the current language dictionary.
+        """
+        return shared_string_table(self.language_strings_dict)
+
+
+    def tile_decoder(self):
+        """Returns the tile decoder compiled for the current language dictionary.
+        """
+        strings = self.string_table()
+        if self._tile_decoder is None or self._tile_decoder.strings is not strings:
+            self._tile_decoder = TileDecoder(strings)
+        return self._tile_decoder
+
+
+    def language_txt_ids(self, labels):
+        """Returns txtIds of the given labels in the language dictionary.
+
+        Parameters:
+        labels (iterable): Language strings to look up.
+
+        Returns:
+        Dictionary of frozensets of txtIds indexed by label, labels not found
+        are omitted.
+        """
+        return self.string_table().txt_ids(labels)
     
     
     async def get_zone(self, module_udid, zone_id):
@@ -379,10 +829,62 @@ class TECH_VERANO:
         Returns:
         Dictionary of zone.
         """
-        await self.get_module_zones(module_udid)
-        return self.zones[zone_id]
+        zones = await self.get_module_zones(module_udid)
+        return zones[zone_id]
     
     
+    def command_queue(self, module_udid):
+        """Returns the command queue of the given module, creating it if needed.
+
+        Parameters:
+        module_udid (string): The Tech module udid.
+
+        Returns:
+        CommandQueue object.
+        """
+        queue = self.command_queues.get(module_udid)
+        if queue is None:
+            queue = self.command_queues[module_udid] = CommandQueue(self, module_udid, self.command_delay)
+        return queue
+
+
+    async def send_control_data(self, module_udid, data):
+        """Queues control commands of a module.
+
+        Commands are debounced and sent in one batch with the other commands
+        queued for the module, only the last command per ido is sent.
+
+        Parameters:
+        module_udid (string): The Tech module udid.
+        data (list): Commands, {"ido", "params", "module_index"} objects.
+
+        Returns:
+        JSON object with the result of the batch.
+        """
+        return await self.command_queue(module_udid).send(data)
+
+
+    async def post_control_data(self, module_udid, data):
+        """Sends control commands of a module in one request.
+
+        Parameters:
+        module_udid (string): The Tech module udid.
+        data (list): Commands, {"ido", "params", "module_index"} objects.
+
+        Returns:
+        JSON object with the result.
+        """
+        path = "frontend/send_control_data"
+        headers = {
+            "Referer": f"https://emodul.eu/web/{module_udid}/control",
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/plain, */*",
+            'Authorization': f"Bearer {self.token}"
+        }
+        _LOGGER.debug("Sending %s control commands of module %s", len(data), module_udid)
+        return await self.tech_post(request_path=path, post_data=self.codec.encode(data), headers=headers)
+
+
     async def set_const_temp(self, module_udid, selectedModuleIndex, target_temp):
         """Sets constant temperature.
         
@@ -396,27 +898,20 @@ class TECH_VERANO:
         result = None
         _LOGGER.debug("Setting constant temperature ...")
         if self.authenticated:
-            path = "frontend/send_control_data"
             data = [{
                 "ido":139,
                 "params":int(target_temp  * 10),
                 "module_index":selectedModuleIndex
             }]
-            headers = self.headers
-            headers = {
-                "Referer": f"https://emodul.eu/web/{module_udid}/control",
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/plain, */*",
-                'Authorization': f"Bearer {self.token}"
-            }
-            _LOGGER.debug(f"Setting constant temperature {target_temp}")
+            _LOGGER.debug("Setting constant temperature %s", target_temp)
             try:
-                #self.session.cookie_jar.clear()
-                result = await self.tech_post(request_path=path, post_data=json.dumps(data), headers=headers)
-                _LOGGER.debug(f"Setting constant temperature successed, results: {result}")
+                result = await self.send_control_data(module_udid, data)
+                _LOGGER.debug("Setting constant temperature successed, results: %s", result)
             except Exception as e:
-                _LOGGER.error(f"Setting constant temperature failed. Error: {e}")
-                raise TechError(401, "Unauthorized")
+                _LOGGER.error("Setting constant temperature failed. Error: %s", e)
+                if isinstance(e, TechError):
+                    raise
+                raise TechError(503, str(e)) from e
         else:
             raise TechError(401, "Unauthorized")
         
@@ -450,27 +945,20 @@ class TECH_VERANO:
 
             if preset_mode in PRESENT_MODES_VALs:
 
-                path = "frontend/send_control_data"
                 data = [{
                     "ido":100,
                     "params":PRESENT_MODES_VALs[preset_mode],
                     "module_index":selectedModuleIndex
                 }]
-                headers = self.headers
-                headers = {
-                    "Referer": f"https://emodul.eu/web/{module_udid}/control",
-                    "Content-Type": "application/json",
-                    "Accept": "application/json, text/plain, */*",
-                    'Authorization': f"Bearer {self.token}"
-                }
-                _LOGGER.debug(f"Setting PRESENT mode {preset_mode}")
+                _LOGGER.debug("Setting PRESENT mode %s", preset_mode)
                 try:
-                    #self.session.cookie_jar.clear()
-                    result = await self.tech_post(request_path=path, post_data=json.dumps(data), headers=headers)
-                    _LOGGER.debug(f"Setting PRESENT mode successed, results: {result}")
+                    result = await self.send_control_data(module_udid, data)
+                    _LOGGER.debug("Setting PRESENT mode successed, results: %s", result)
                 except Exception as e:
-                    _LOGGER.error(f"Setting PRESENT mode failed. Error: {e}")
-                    raise TechError(401, "Unauthorized")
+                    _LOGGER.error("Setting PRESENT mode failed. Error: %s", e)
+                    if isinstance(e, TechError):
+                        raise
+                    raise TechError(503, str(e)) from e
         else:
             raise TechError(401, "Unauthorized")
         
@@ -492,7 +980,6 @@ class TECH_VERANO:
 
         if self.authenticated:
 
-            path = "frontend/send_control_data"
             data = []
             FAN_MODE_SET = {
                 "ido":140,
@@ -504,14 +991,6 @@ class TECH_VERANO:
                 "params":0,
                 "module_index":selectedModuleIndex
             }
-            headers = self.headers
-            headers = {
-                "Referer": f"https://emodul.eu/web/{module_udid}/control",
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/plain, */*",
-                'Authorization': f"Bearer {self.token}"
-            }
-
             if fan_mode == "auto":
                 FAN_MODE_SET["params"] = 3
                 data.append(FAN_MODE_SET)
@@ -534,13 +1013,15 @@ class TECH_VERANO:
                 data.append(FAN_SPEED_SET)
                 data.append(FAN_MODE_SET)
 
-            _LOGGER.debug(f"Setting FAN_MODE mode {fan_mode}")
+            _LOGGER.debug("Setting FAN_MODE mode %s", fan_mode)
             try:
-                result = await self.tech_post(request_path=path, post_data=json.dumps(data), headers=headers)
-                _LOGGER.debug(f"Setting FAN_MODE successed, results: {result}")
+                result = await self.send_control_data(module_udid, data)
+                _LOGGER.debug("Setting FAN_MODE successed, results: %s", result)
             except Exception as e:
-                _LOGGER.error(f"Setting FAN_MODE mode failed. Error: {e}")
-                raise TechError(401, "Unauthorized")
+                _LOGGER.error("Setting FAN_MODE mode failed. Error: %s", e)
+                if isinstance(e, TechError):
+                    raise
+                raise TechError(503, str(e)) from e
         else:
             raise TechError(401, "Unauthorized")
         
@@ -575,6 +1056,94 @@ class TECH_VERANO:
         return result
 
 
+def _has_max_age(set_cookie):
+    """Check if a Set-Cookie header sets the lifetime of the cookie relative to now."""
+    return "max-age=" in set_cookie.lower()
+
+
+class CommandQueue:
+    """Debounced control commands of a module.
+
+    Commands queued within [delay] seconds of each other are sent in one
+    frontend/send_control_data request, a later command replaces a queued
+    command with the same ido.
+    """
+
+    def __init__(self, api, module_udid, delay):
+        self.api = api
+        self.module_udid = module_udid
+        self.delay = delay
+        self._pending = {}
+        self._future = None
+        self._timer = None
+        self._tasks = set()
+
+    async def send(self, data):
+        """Queue commands and wait for the result of the batch they are sent in."""
+        loop = asyncio.get_running_loop()
+        for command in data:
+            # Re-insert to keep the order in which the commands were last set.
+            self._pending.pop(command["ido"], None)
+            self._pending[command["ido"]] = command
+
+        if self._future is None:
+            self._future = loop.create_future()
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_later(self.delay, self._flush)
+
+        return await asyncio.shield(self._future)
+
+    def _flush(self):
+        """Send the queued commands in one request."""
+        data = list(self._pending.values())
+        future = self._future
+        self._pending = {}
+        self._future = None
+        self._timer = None
+        task = asyncio.ensure_future(self._post(data, future))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _post(self, data, future):
+        try:
+            result = await self.api.post_control_data(self.module_udid, data)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+
+class CacheEntry:
+    """Cached value of a single module view.
+
+    Every entry has its own TTL and freshness metadata, and the lock of its
+    module, so different modules can be refreshed concurrently.
+    """
+
+    def __init__(self, ttl, lock):
+        self.ttl = ttl
+        self.value = None
+        self.updated = None
+        self.lock = lock
+
+    @property
+    def age(self):
+        """Seconds since the last update, None if never updated."""
+        if self.updated is None:
+            return None
+        return time.monotonic() - self.updated
+
+    def is_fresh(self, max_age = None):
+        """Check if the cached value is younger than [max_age], the TTL by default."""
+        return self.updated is not None and self.age < (self.ttl if max_age is None else max_age)
+
+    def set(self, value):
+        """Store a new value and mark it as fresh."""
+        self.value = value
+        self.updated = time.monotonic()
+
+
 class TechError(Exception):
     """Raised when Tech APi request ended in error.
     Attributes: